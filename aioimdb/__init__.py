@@ -1,6 +1,34 @@
 # -*- coding: utf-8 -*-
 from .client import Imdb                                                # noqa
-from .exceptions import ImdbAPIError                                    # noqa
+from .exceptions import (ImdbAPIError, ImdbCircuitOpenError,           # noqa
+                         ImdbDeadlineExceeded)
 
 
 __version__ = '1.1.2'
+
+# the modules below pull in asyncio and friends, so they are only imported
+# when one of their names is first accessed
+_LAZY_ATTRIBUTES = {
+    'AssetPipeline': 'assets',
+    'BatchSearch': 'search',
+    'Crawler': 'crawler',
+    'LoopLagMonitor': 'monitor',
+    'RequestScheduler': 'scheduler',
+    'ResiliencePolicy': 'resilience',
+    'SyncImdb': 'sync',
+    'scheduling': 'scheduler',
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    from importlib import import_module
+    value = getattr(import_module(f'.{_LAZY_ATTRIBUTES[name]}', __name__),
+                    name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import posixpath
+from collections import namedtuple
+from http import HTTPStatus
+from urllib.parse import urlparse
+
+from .exceptions import ImdbAPIError
+from .utils import aiterate
+
+logger = logging.getLogger(__name__)
+
+
+Asset = namedtuple('Asset', ['imdb_id', 'kind', 'id', 'url', 'rendition',
+                             'metadata'])
+
+DownloadResult = namedtuple('DownloadResult', ['asset', 'path', 'sha256',
+                                               'size', 'status', 'error'])
+
+DOWNLOADED = 'downloaded'
+CACHED = 'cached'
+DUPLICATE = 'duplicate'
+FAILED = 'failed'
+
+MANIFEST_NAME = 'manifest.json'
+
+_DONE = object()
+_PRODUCED = object()
+
+
+class AssetPipeline(object):
+    """
+    Stream image and video entries of titles and names and download them to
+    `directory` through the client's connection pool.
+
+    Downloads are written chunk by chunk to a partial file which is resumed
+    with a range request if the pipeline is interrupted. Completed files are
+    stored under their sha256 so identical content is kept once, and a
+    manifest maps every downloaded url to its file so urls are only fetched
+    once across runs. Result paths are relative to `directory`.
+
+    Usage:
+
+        async with Imdb() as imdb:
+            pipeline = AssetPipeline(imdb, 'assets/', renditions={'480p'})
+            async for result in pipeline.run(['tt0111161']):
+                print(result.status, result.asset.url, result.path)
+    """
+
+    TITLE_KINDS = {'images': 'get_title_images', 'videos': 'get_title_videos'}
+    NAME_KINDS = {'images': 'get_name_images', 'videos': 'get_name_videos'}
+
+    def __init__(self, imdb, directory, concurrency=4, chunk_size=65536,
+                 renditions=None, kinds=('images', 'videos'),
+                 manifest_every=50):
+        if concurrency < 1:
+            raise ValueError('concurrency must be greater than zero')
+        self.imdb = imdb
+        self.directory = directory
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self.renditions = renditions
+        self.kinds = kinds
+        self.manifest_every = manifest_every
+        self._manifest_path = os.path.join(directory, MANIFEST_NAME)
+        self._manifest = None
+        self._unsaved = 0
+
+    @staticmethod
+    def _image_assets(imdb_id, resource):
+        for image in resource.get('images', []):
+            if image.get('url'):
+                yield Asset(imdb_id, 'image', image.get('id'), image['url'],
+                            'original', image)
+
+    @staticmethod
+    def _video_assets(imdb_id, resource):
+        for video in resource.get('videos', []):
+            for encoding in video.get('encodings', []):
+                url = encoding.get('play') or encoding.get('url')
+                if url:
+                    rendition = encoding.get('definition') or \
+                        encoding.get('mimeType')
+                    yield Asset(imdb_id, 'video', video.get('id'), url,
+                                rendition, video)
+
+    async def iter_assets(self, imdb_id, errors=None):
+        """
+        Yield the `Asset` entries of a title or name, one per rendition.
+
+        :param errors: List to which `(kind, exception)` is appended when
+            listing a kind fails with `ImdbAPIError`, instead of raising.
+        """
+        self.imdb.validate_imdb_id(imdb_id)
+        methods = self.TITLE_KINDS if imdb_id.startswith('tt') else \
+            self.NAME_KINDS
+        for kind in self.kinds:
+            try:
+                resource = await getattr(self.imdb, methods[kind])(imdb_id)
+            except LookupError:
+                continue
+            except ImdbAPIError as exc:
+                if errors is None:
+                    raise
+                errors.append((kind, exc))
+                continue
+            if not resource:
+                continue
+            extract = self._image_assets if kind == 'images' else \
+                self._video_assets
+            for asset in extract(imdb_id, resource):
+                if self.renditions is None or \
+                        asset.rendition in self.renditions:
+                    yield asset
+
+    async def run(self, imdb_ids):
+        """
+        Download the selected assets of every id in `imdb_ids`, yielding a
+        `DownloadResult` for each asset as it completes. Listing the images
+        or videos of an id may fail, which yields a failed result whose
+        asset only has the id and kind set.
+        """
+        async def assets():
+            async for imdb_id in aiterate(imdb_ids):
+                errors = []
+                async for asset in self.iter_assets(imdb_id, errors):
+                    yield asset
+                for kind, exc in errors:
+                    logger.warning('Failed to list %s of %s: %s',
+                                   kind, imdb_id, exc)
+                    asset = Asset(imdb_id, kind[:-1], None, None, None, None)
+                    yield DownloadResult(asset, None, None, None, FAILED, exc)
+
+        async for result in self.download(assets()):
+            yield result
+
+    async def download(self, assets):
+        """
+        Download an iterable, or async iterable, of `Asset`, yielding a
+        `DownloadResult` for each as it completes.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_manifest()
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        results = asyncio.Queue()
+
+        async def produce():
+            seen = set()
+            async for asset in aiterate(assets):
+                if isinstance(asset, DownloadResult):
+                    # listing failure reported by `run`
+                    await results.put(asset)
+                    continue
+                entry = self._manifest['urls'].get(asset.url)
+                if entry is not None:
+                    await results.put(DownloadResult(
+                        asset, entry['path'], entry['sha256'],
+                        entry['size'], CACHED, None))
+                    continue
+                if asset.url in seen:
+                    await results.put(DownloadResult(
+                        asset, None, None, None, DUPLICATE, None))
+                    continue
+                seen.add(asset.url)
+                await queue.put(asset)
+            for _ in range(self.concurrency):
+                await queue.put(None)
+
+        async def work():
+            try:
+                while True:
+                    asset = await queue.get()
+                    if asset is None:
+                        break
+                    await results.put(await self._download_one(asset))
+            finally:
+                await results.put(_DONE)
+
+        producer = asyncio.ensure_future(produce())
+        # the end of the listing is reported through the unbounded results
+        # queue, so that a failing listing stops the download instead of
+        # leaving the workers waiting for assets, and nothing ever blocks
+        # on the asset queue once the download is cancelled
+        producer.add_done_callback(lambda _: results.put_nowait(_PRODUCED))
+        workers = [asyncio.ensure_future(work())
+                   for _ in range(self.concurrency)]
+        try:
+            running = len(workers)
+            while running:
+                result = await results.get()
+                if result is _DONE:
+                    running -= 1
+                elif result is _PRODUCED:
+                    producer.result()
+                else:
+                    yield result
+        finally:
+            for task in [producer] + workers:
+                task.cancel()
+            self._save_manifest()
+
+    def _load_manifest(self):
+        if self._manifest is not None:
+            return
+        if os.path.exists(self._manifest_path):
+            with open(self._manifest_path) as f:
+                self._manifest = json.load(f)
+        else:
+            self._manifest = {'urls': {}, 'hashes': {}}
+
+    def _save_manifest(self):
+        if self._manifest is None:
+            return
+        tmp_path = f'{self._manifest_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._manifest, f)
+        os.replace(tmp_path, self._manifest_path)
+        self._unsaved = 0
+
+    def _record(self, url, path, sha256, size):
+        self._manifest['urls'][url] = {
+            'path': path, 'sha256': sha256, 'size': size,
+        }
+        self._manifest['hashes'].setdefault(sha256, path)
+        self._unsaved += 1
+        if self._unsaved >= self.manifest_every:
+            self._save_manifest()
+
+    def _partial_path(self, url):
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f'{digest}.part')
+
+    def _hash_file(self, path):
+        sha256 = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                sha256.update(chunk)
+        return sha256
+
+    async def _download_one(self, asset):
+        try:
+            return await self._fetch(asset)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            # any error, e.g. asyncio.TimeoutError, fails the asset rather
+            # than the worker
+            logger.warning('Failed to download %s: %s', asset.url, exc)
+            return DownloadResult(asset, None, None, None, FAILED, exc)
+
+    async def _fetch(self, asset):
+        partial_path = self._partial_path(asset.url)
+        offset = 0
+        headers = {}
+        if os.path.exists(partial_path):
+            offset = os.path.getsize(partial_path)
+            headers['Range'] = f'bytes={offset}-'
+
+        async with self.imdb._request_slot(), \
+                self.imdb.session.get(asset.url, headers=headers) as r:
+            if r.status == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE and \
+                    offset:
+                # interrupted after the last write, the partial file is
+                # complete unless the server reports another size
+                size = r.headers.get('Content-Range', '').rpartition('/')[2]
+                if size.isdigit() and int(size) != offset:
+                    os.remove(partial_path)
+                    raise ImdbAPIError(
+                        f'Partial download of {asset.url} does not match')
+                sha256 = await self.imdb._run_blocking(
+                    self._hash_file, partial_path)
+                mode = None
+            elif r.status == HTTPStatus.PARTIAL_CONTENT and offset:
+                sha256 = await self.imdb._run_blocking(
+                    self._hash_file, partial_path)
+                mode = 'ab'
+            elif r.status == HTTPStatus.OK:
+                sha256 = hashlib.sha256()
+                mode = 'wb'
+            else:
+                raise ImdbAPIError(f'{r.status} downloading {asset.url}')
+            if mode is not None:
+                with open(partial_path, mode) as f:
+                    async for chunk in r.content.iter_chunked(
+                            self.chunk_size):
+                        f.write(chunk)
+                        sha256.update(chunk)
+
+        digest = sha256.hexdigest()
+        size = os.path.getsize(partial_path)
+        existing = self._manifest['hashes'].get(digest)
+        if existing and os.path.exists(
+                os.path.join(self.directory, existing)):
+            os.remove(partial_path)
+            self._record(asset.url, existing, digest, size)
+            return DownloadResult(asset, existing, digest, size, DUPLICATE,
+                                  None)
+
+        extension = posixpath.splitext(urlparse(asset.url).path)[1]
+        path = os.path.join(digest[:2], f'{digest}{extension}')
+        os.makedirs(os.path.join(self.directory, digest[:2]), exist_ok=True)
+        os.replace(partial_path, os.path.join(self.directory, path))
+        self._record(asset.url, path, digest, size)
+        return DownloadResult(asset, path, digest, size, DOWNLOADED, None)
@@ -1,71 +1,88 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, unicode_literals
-import aiohttp
 import tempfile
+from contextlib import contextmanager
 from datetime import datetime
 from base64 import encodebytes
-
-import diskcache
-from dateutil.tz import tzutc
-from dateutil.parser import parse
-import boto.utils
+from functools import lru_cache
 from urllib.parse import urlparse, parse_qs, quote
-from boto import provider
-from boto.connection import HTTPRequest
-from boto.auth import HmacAuthV3HTTPHandler
 
 from .constants import APP_KEY, HOST, USER_AGENT, BASE_URI
 
-
-class ZuluHmacAuthV3HTTPHandler(HmacAuthV3HTTPHandler):
-
-    def sign_string(self, string_to_sign):
-        new_hmac = self._get_hmac()
-        new_hmac.update(string_to_sign)
-        return encodebytes(new_hmac.digest()).decode('utf-8').strip()
-
-    def headers_to_sign(self, http_request):
-        headers_to_sign = {'Host': self.host}
-        for name, value in http_request.headers.items():
-            lname = name.lower()
-            if lname.startswith('x-amz'):
-                headers_to_sign[name] = value
-        return headers_to_sign
-
-    def canonical_query_string(self, http_request):
-        if http_request.method == 'POST':
-            return ''
-        qs_parts = []
-        for param in sorted(http_request.params):
-            value = boto.utils.get_utf8_value(http_request.params[param])
-            param_ = quote(param, safe='-_.~')
-            value_ = quote(value, safe='-_.~')
-            qs_parts.append('{0}={1}'.format(param_, value_))
-        return '&'.join(qs_parts)
-
-    def string_to_sign(self, http_request):
-        headers_to_sign = self.headers_to_sign(http_request)
-        canonical_qs = self.canonical_query_string(http_request)
-        canonical_headers = self.canonical_headers(headers_to_sign)
-        string_to_sign = '\n'.join((
-            http_request.method,
-            http_request.path,
-            canonical_qs,
-            canonical_headers,
-            '',
-            http_request.body
-        ))
-        return string_to_sign, headers_to_sign
-
-
-async def _get_credentials():
+# boto, diskcache, dateutil and aiohttp are slow to import, so they are only
+# imported when first needed to keep `import aioimdb` cheap.
+
+
+@lru_cache(maxsize=None)
+def _handler_class():
+    import boto.utils
+    from boto.auth import HmacAuthV3HTTPHandler
+
+    class ZuluHmacAuthV3HTTPHandler(HmacAuthV3HTTPHandler):
+
+        def sign_string(self, string_to_sign):
+            new_hmac = self._get_hmac()
+            new_hmac.update(string_to_sign)
+            return encodebytes(new_hmac.digest()).decode('utf-8').strip()
+
+        def headers_to_sign(self, http_request):
+            headers_to_sign = {'Host': self.host}
+            for name, value in http_request.headers.items():
+                lname = name.lower()
+                if lname.startswith('x-amz'):
+                    headers_to_sign[name] = value
+            return headers_to_sign
+
+        def canonical_query_string(self, http_request):
+            if http_request.method == 'POST':
+                return ''
+            qs_parts = []
+            for param in sorted(http_request.params):
+                value = boto.utils.get_utf8_value(http_request.params[param])
+                param_ = quote(param, safe='-_.~')
+                value_ = quote(value, safe='-_.~')
+                qs_parts.append('{0}={1}'.format(param_, value_))
+            return '&'.join(qs_parts)
+
+        def string_to_sign(self, http_request):
+            headers_to_sign = self.headers_to_sign(http_request)
+            canonical_qs = self.canonical_query_string(http_request)
+            canonical_headers = self.canonical_headers(headers_to_sign)
+            string_to_sign = '\n'.join((
+                http_request.method,
+                http_request.path,
+                canonical_qs,
+                canonical_headers,
+                '',
+                http_request.body
+            ))
+            return string_to_sign, headers_to_sign
+
+    return ZuluHmacAuthV3HTTPHandler
+
+
+def __getattr__(name):
+    if name == 'ZuluHmacAuthV3HTTPHandler':
+        return _handler_class()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def _open_cache(directory):
+    import diskcache
+    return diskcache.Cache(directory=directory)
+
+
+async def _get_credentials(session=None):
+    import aiohttp
     url = '{0}/authentication/credentials/temporary/ios82'.format(BASE_URI)
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url,
-                                json={'appKey': APP_KEY},
-                                headers={'User-Agent': USER_AGENT}) as res:
-            res.raise_for_status()
-            data = await res.json(encoding='utf-8')
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await _get_credentials(session)
+    async with session.post(url,
+                            json={'appKey': APP_KEY},
+                            headers={'User-Agent': USER_AGENT}) as res:
+        res.raise_for_status()
+        data = await res.json(encoding='utf-8')
     return data['resource']
 
 
@@ -74,23 +91,43 @@ class Auth(object):
     SOON_EXPIRES_SECONDS = 60
     _CREDS_STORAGE_KEY = 'aioimdb-credentials'
 
+    # credentials are kept in memory once read, so that the disk cache is
+    # only touched when they are first needed and when they are renewed
+    _creds = None
+    # shared by concurrent requests, so that the disk cache is read and new
+    # credentials are requested once
+    _creds_refresh = None
+
     def __init__(self, creds=None):
         self._cachedir = tempfile.gettempdir()
 
+    @contextmanager
+    def _phase(self, name):
+        yield
+
+    async def _run_blocking(self, fn, *args):
+        return fn(*args)
+
     def _get_creds(self):
-        with diskcache.Cache(directory=self._cachedir) as cache:
-            return cache.get(self._CREDS_STORAGE_KEY)
+        if self._creds is None:
+            with _open_cache(self._cachedir) as cache:
+                self._creds = cache.get(self._CREDS_STORAGE_KEY)
+        return self._creds
 
     def _set_creds(self, creds):
-        with diskcache.Cache(directory=self._cachedir) as cache:
+        with _open_cache(self._cachedir) as cache:
             cache[self._CREDS_STORAGE_KEY] = creds
+        self._creds = creds
         return creds
 
     def clear_cached_credentials(self):
-        with diskcache.Cache(directory=self._cachedir) as cache:
+        with _open_cache(self._cachedir) as cache:
             cache.delete(self._CREDS_STORAGE_KEY)
+        self._creds = None
 
     def _creds_soon_expiring(self):
+        from dateutil.tz import tzutc
+        from dateutil.parser import parse
         creds = self._get_creds()
         if not creds:
             return creds, True
@@ -105,12 +142,40 @@ class Auth(object):
         else:
             return creds, True
 
-    async def get_auth_headers(self, url_path):
-        creds, soon_expires = self._creds_soon_expiring()
+    async def _renew_creds(self, session=None):
+        creds = await _get_credentials(session)
+        return await self._run_blocking(self._set_creds, creds)
+
+    async def _refresh_creds(self):
+        creds, soon_expires = await self._run_blocking(
+            self._creds_soon_expiring)
         if soon_expires:
-            creds = self._set_creds(creds=await _get_credentials())
+            creds = await self._renew_creds()
+        return creds
+
+    async def _current_creds(self):
+        if self._creds is not None:
+            with self._phase('credentials'):
+                creds, soon_expires = self._creds_soon_expiring()
+            if not soon_expires:
+                return creds
+        import asyncio
+        if self._creds_refresh is None or self._creds_refresh.done():
+            self._creds_refresh = asyncio.ensure_future(
+                self._refresh_creds())
+        return await asyncio.shield(self._creds_refresh)
+
+    async def get_auth_headers(self, url_path):
+        creds = await self._current_creds()
+
+        with self._phase('sign'):
+            return self._sign(creds, url_path)
 
-        handler = ZuluHmacAuthV3HTTPHandler(
+    @staticmethod
+    def _sign(creds, url_path):
+        from boto import provider
+        from boto.connection import HTTPRequest
+        handler = _handler_class()(
             host=HOST,
             config={},
             provider=provider.Provider(
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+import time
+from collections import OrderedDict
+
+
+class ResponseCache(object):
+    """
+    Bounded in-memory LRU cache of raw response bodies, keyed by request.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @staticmethod
+    def make_key(url, params=None, locale=None):
+        return (url, tuple(sorted((params or {}).items())), locale)
+
+    def get(self, key, max_age=None):
+        """
+        Return the cached value for `key`, or None if it is missing or older
+        than `max_age` seconds.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if max_age is not None and time.monotonic() - stored_at > max_age:
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
@@ -1,20 +1,29 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, unicode_literals
+from contextlib import asynccontextmanager, nullcontext
 from functools import wraps
 import re
 import json
 import tempfile
+import time
 import logging
 from http import HTTPStatus
 from urllib.parse import quote, unquote, urlparse, urljoin, urlencode
-import aiohttp
 
 from .constants import BASE_URI, SEARCH_BASE_URI
 from .auth import Auth
+from .cache import ResponseCache
 from .exceptions import ImdbAPIError
+from .ids import extract_imdb_ids
+from .jsonstream import WILDCARD, JsonItemStream
 
 logger = logging.getLogger(__name__)
 
+_MISSING = object()
+
+# hosts the client talks to, whose connections `Imdb.warmup` pre-opens
+WARMUP_HOSTS = (BASE_URI, 'https://www.imdb.com', SEARCH_BASE_URI)
+
 
 ENDPOINTS = {
     'get_name': '/name/{imdb_id}/fulldetails',
@@ -45,6 +54,25 @@ ENDPOINTS = {
     'get_title_plot_taglines': '/title/{imdb_id}/taglines',
 }
 
+# request timeouts in seconds applied by a `ResiliencePolicy`, by endpoint
+# name, for endpoints that are slower than its `default_timeout`
+ENDPOINT_TIMEOUTS = {
+    'get_title_credits': 30,
+    'get_title_releases': 20,
+    'get_title_user_reviews': 20,
+    'get_title_episodes_detailed': 30,
+}
+
+_ENDPOINT_NAMES = {uri: name for name, uri in ENDPOINTS.items()}
+_ENDPOINT_NAMES.update({
+    '/title/{imdb_id}/auxiliary': 'get_title',
+    '/title/{imdb_id}/episodes': 'get_title_episodes',
+    '/template/imdb-ios-writable/tv-episodes-v2.jstl/render':
+        'get_title_episodes_detailed',
+    '/template/imdb-android-writable/7.3.top-crew.jstl/render':
+        'get_title_top_crew',
+})
+
 
 def logit(fn):
     @wraps(fn)
@@ -57,18 +85,154 @@ def logit(fn):
 
 
 class Imdb(Auth):
-    def __init__(self, locale=None, exclude_episodes=False, session=None):
+    def __init__(self, locale=None, exclude_episodes=False, session=None,
+                 scheduler=None, resilience=None, cache_ttl=None,
+                 cache_size=1024, monitor=None, executor=None,
+                 max_blocking=4, offload_threshold=None):
         self.locale = locale or 'en_US'
         self.exclude_episodes = exclude_episodes
-        self.session = session or aiohttp.ClientSession()
+        self.scheduler = scheduler
+        self.resilience = resilience
+        self.cache_ttl = cache_ttl
+        self.response_cache = ResponseCache(cache_size) \
+            if cache_ttl is not None else None
+        self.monitor = monitor
+        self.max_blocking = max_blocking
+        self.offload_threshold = offload_threshold
+        self._executor = executor
+        self._thread_pool = None
+        self._blocking_slots = None
+        self._session = session
         self._cachedir = tempfile.gettempdir()
 
     async def __aenter__(self):
+        if self.monitor is not None:
+            self.monitor.start()
         return self
 
     async def __aexit__(self, etype, evalue, etb):
-        if self.session is not None:
-            await self.session.close()
+        if self.monitor is not None:
+            await self.monitor.stop()
+        if self._session is not None:
+            await self._session.close()
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False)
+            self._thread_pool = None
+
+    @property
+    def session(self):
+        # created on first use so that clients which never send a request
+        # do not pay for importing aiohttp and opening a session
+        if self._session is None:
+            import aiohttp
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    @session.setter
+    def session(self, session):
+        self._session = session
+
+    @asynccontextmanager
+    async def _request_slot(self):
+        if self.scheduler is None:
+            yield
+        else:
+            async with self.scheduler.slot():
+                yield
+
+    def _phase(self, name):
+        if self.monitor is None:
+            return nullcontext()
+        return self.monitor.phase(name)
+
+    async def _run_blocking(self, fn, *args, executor=None):
+        # run in a bounded executor so that blocking calls neither stall
+        # the loop nor pile up in the executor queue; disk cache access and
+        # hashing use bound methods that cannot be pickled, so they always
+        # run in the client's own threads whatever `executor` is
+        import asyncio
+        if self._blocking_slots is None:
+            self._blocking_slots = asyncio.Semaphore(self.max_blocking)
+        if executor is None:
+            if self._thread_pool is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self._thread_pool = ThreadPoolExecutor(
+                    self.max_blocking, thread_name_prefix='aioimdb')
+            executor = self._thread_pool
+        async with self._blocking_slots:
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, fn, *args)
+
+    async def _renew_creds(self, session=None):
+        return await super()._renew_creds(session=session or self.session)
+
+    async def warmup(self, prefetch=None, hosts=WARMUP_HOSTS, connections=1):
+        """
+        Prepare the client for its first requests by loading credentials,
+        opening `connections` pooled connections to each of `hosts` and
+        prefetching the titles and names in `prefetch` into the response
+        cache, concurrently. Failures are logged rather than raised.
+
+        Return the time in seconds taken by each phase and in total.
+
+        :param prefetch: Iterable of hot title and name imdb ids, requires a
+            `cache_ttl`.
+        :param hosts: Base urls of the hosts to connect to.
+        :param connections: Number of connections to open per host.
+        """
+        import asyncio
+        import aiohttp
+        prefetch = list(prefetch or [])
+        if prefetch and self.response_cache is None:
+            raise ValueError('prefetching requires a cache_ttl')
+        timings = {}
+        started = time.monotonic()
+
+        async def timed(phase, coro):
+            phase_started = time.monotonic()
+            try:
+                return await coro
+            finally:
+                timings[phase] = time.monotonic() - phase_started
+
+        async def connect(url):
+            try:
+                async with self.session.head(
+                        url, allow_redirects=False) as response:
+                    await response.release()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                logger.warning(f'Failed to connect to {url}: {exc}')
+
+        async def prefetch_ids(credentials):
+            # wait for the credentials so that prefetches do not all
+            # request their own
+            await asyncio.wait([credentials])
+            fetches = [
+                self.get_title(imdb_id) if imdb_id.startswith('tt') else
+                self.get_name(imdb_id)
+                for imdb_id in prefetch
+            ]
+            results = await asyncio.gather(*fetches, return_exceptions=True)
+            for imdb_id, result in zip(prefetch, results):
+                if isinstance(result, Exception):
+                    logger.warning(f'Failed to prefetch {imdb_id}: {result}')
+
+        credentials = asyncio.ensure_future(
+            timed('credentials', self._current_creds()))
+        phases = [
+            credentials,
+            timed('connections', asyncio.gather(*[
+                connect(f'{host}/') for host in hosts
+                for _ in range(connections)
+            ])),
+        ]
+        if prefetch:
+            phases.append(timed('prefetch', prefetch_ids(credentials)))
+        results = await asyncio.gather(*phases, return_exceptions=True)
+        if isinstance(results[0], Exception):
+            logger.warning(f'Failed to load credentials: {results[0]}')
+        timings['total'] = time.monotonic() - started
+        return timings
 
     def __getattr__(self, name):
         if name not in ENDPOINTS:
@@ -78,14 +242,93 @@ class Imdb(Auth):
         return lambda *args, **kwargs: self._fetch(name, uri, *args, **kwargs)
 
     @logit
-    async def get_title(self, imdb_id):
+    async def get_title(self, imdb_id, locale=None):
+        self.validate_imdb_id(imdb_id)
+        await self._redirection_title_check(imdb_id)
+        try:
+            resource = await self._get_resource(
+                f'/title/{imdb_id}/auxiliary', locale=locale)
+        except LookupError:
+            self._title_not_found()
+        self._check_episode(resource)
+        return resource
+
+    @logit
+    async def get_title_localized(self, imdb_id, locales):
+        """
+        Request title information in several locales at once.
+
+        The locale variants are fetched concurrently after a single
+        redirection check and share the request signature. Fields with the
+        same value in every locale are returned once under 'common' and the
+        others under 'locales', so that merging 'common' with a locale's
+        entry gives the resource in that locale.
+        :param imdb_id: The imdb id including the TT prefix.
+        :param locales: Locales to fetch, e.g. ['en_US', 'fr_FR'].
+        """
         self.validate_imdb_id(imdb_id)
+        locales = list(dict.fromkeys(locales))
+        if not locales:
+            raise ValueError('at least one locale is required')
         await self._redirection_title_check(imdb_id)
+
+        import asyncio
+        path = f'/title/{imdb_id}/auxiliary'
+        auth_headers = await self.get_auth_headers(path)
         try:
-            resource = await self._get_resource(f'/title/{imdb_id}/auxiliary')
+            resources = await asyncio.gather(*[
+                self._get_resource(path, locale=locale,
+                                   auth_headers=auth_headers)
+                for locale in locales
+            ])
         except LookupError:
             self._title_not_found()
+        for resource in resources:
+            self._check_episode(resource)
+
+        common, localized = self._split_localized(
+            dict(zip(locales, resources)))
+        return {
+            'common': {} if common is _MISSING else common,
+            'locales': {
+                locale: localized.get(locale, {}) for locale in locales
+            },
+        }
+
+    @classmethod
+    def _split_localized(cls, resources):
+        values = list(resources.values())
+        if not all(isinstance(value, dict) for value in values):
+            if all(value == values[0] for value in values):
+                return values[0], {}
+            return _MISSING, dict(resources)
+
+        common = {}
+        localized = {locale: {} for locale in resources}
+        keys = list(dict.fromkeys(key for value in values for key in value))
+        for key in keys:
+            variants = {
+                locale: value[key]
+                for locale, value in resources.items() if key in value
+            }
+            if len(variants) < len(resources):
+                # missing in some locales, so it can not be shared
+                for locale, value in variants.items():
+                    localized[locale][key] = value
+                continue
+            shared, overrides = cls._split_localized(variants)
+            if shared is not _MISSING:
+                common[key] = shared
+            for locale, value in overrides.items():
+                localized[locale][key] = value
+
+        if keys and not common:
+            common = _MISSING
+        return common, {
+            locale: value for locale, value in localized.items() if value
+        }
 
+    def _check_episode(self, resource):
         if (
             self.exclude_episodes is True and
             resource['base']['titleType'] == 'tvEpisode'
@@ -94,13 +337,13 @@ class Imdb(Auth):
                 'Title not found. Title was an episode and '
                 '"exclude_episodes" is set to true'
             )
-        return resource
 
     async def title_exists(self, imdb_id):
         self.validate_imdb_id(imdb_id)
         page_url = f'https://www.imdb.com/title/{imdb_id}/'
 
-        async with self.session.head(page_url) as response:
+        async with self._request_slot(), \
+                self.session.head(page_url) as response:
             if response.status == HTTPStatus.OK:
                 return True
             elif response.status == HTTPStatus.NOT_FOUND:
@@ -111,27 +354,31 @@ class Imdb(Auth):
             else:
                 response.raise_for_status()
 
-    async def _search_for(self, item, result_mapping):
-        item = re.sub(r'\W+', '_', item).strip('_')
+    @staticmethod
+    def _normalize_query(item):
+        return re.sub(r'\W+', '_', item).strip('_')
+
+    async def _search_for(self, item, result_mapping, locale=None):
+        item = self._normalize_query(item)
         query = quote(item)
         first_alphanum_char = self._query_first_alpha_num(item)
         url = f'{SEARCH_BASE_URI}/suggests/{first_alphanum_char}/{query}.json'
 
-        results = await self._get(url=url, query=query)
+        results = await self._get(url=url, query=query, locale=locale)
         return [{name: res.get(key, None)
                  for name, key in result_mapping.items()}
                 for res in results.get('d', [])]
 
     @logit
-    async def search_for_name(self, name):
+    async def search_for_name(self, name, locale=None):
         mapping = {'name': 'l', 'imdb_id': 'id'}
-        return [res for res in await self._search_for(name, mapping)
+        return [res for res in await self._search_for(name, mapping, locale)
                 if res['imdb_id'].startswith('nm')]
 
     @logit
-    async def search_for_title(self, title):
+    async def search_for_title(self, title, locale=None):
         mapping = {'title': 'l', 'year': 'y', 'imdb_id': 'id', 'type': 'q'}
-        return await self._search_for(title, mapping)
+        return await self._search_for(title, mapping, locale)
 
     async def get_popular_titles(self):
         return await self._get_resource('/chart/titlemeter')
@@ -143,12 +390,80 @@ class Imdb(Auth):
         return await self._get_resource('/chart/moviemeter')
 
     @logit
-    async def _fetch(self, name, uri, imdb_id):
+    async def _fetch(self, name, uri, imdb_id, locale=None):
         if name.startswith('get_title'):
             await self._redirection_title_check(imdb_id)
 
         self.validate_imdb_id(imdb_id)
-        return await self._get_resource(uri.format(imdb_id=imdb_id))
+        return await self._get_resource(uri.format(imdb_id=imdb_id),
+                                        locale=locale)
+
+    @logit
+    async def get_names_with_filmography(self, name_ids, hydrate='get_title',
+                                         concurrency=10):
+        """
+        Request details and filmography of several names, hydrating every
+        title credited in any of the filmographies once.
+
+        Returns a dict mapping each name id to None if the name was not found
+        or to a dict with 'name', 'filmography' and 'titles' keys. 'titles'
+        maps the credited title ids to the hydrated resources (None for
+        titles not found); a title credited to several names is the same
+        object in each of their 'titles'.
+        :param name_ids: The imdb ids including the NM prefix.
+        :param hydrate: Name of the client method used to fetch each title,
+            or None to skip hydration.
+        :param concurrency: Maximum number of concurrent requests.
+        """
+        import asyncio
+        name_ids = list(dict.fromkeys(name_ids))
+        for name_id in name_ids:
+            self.validate_imdb_id(name_id)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded(method, imdb_id):
+            async with semaphore:
+                try:
+                    return await method(imdb_id)
+                except LookupError:
+                    return None
+
+        people = await asyncio.gather(*[
+            asyncio.gather(bounded(self.get_name, name_id),
+                           bounded(self.get_name_filmography, name_id))
+            for name_id in name_ids
+        ])
+
+        credits = {
+            name_id: extract_imdb_ids(filmography, prefixes=('tt', ))
+            for name_id, (name, filmography) in zip(name_ids, people)
+            if name is not None
+        }
+        titles = {}
+        if hydrate:
+            title_ids = list(dict.fromkeys(
+                title_id for title_ids in credits.values()
+                for title_id in title_ids))
+            resources = await asyncio.gather(*[
+                bounded(getattr(self, hydrate), title_id)
+                for title_id in title_ids
+            ])
+            titles = dict(zip(title_ids, resources))
+
+        results = {}
+        for name_id, (name, filmography) in zip(name_ids, people):
+            if name is None:
+                results[name_id] = None
+                continue
+            results[name_id] = {
+                'name': name,
+                'filmography': filmography,
+                'titles': {
+                    title_id: titles.get(title_id)
+                    for title_id in credits[name_id]
+                },
+            }
+        return results
 
     @logit
     async def get_title_episodes(self, imdb_id):
@@ -168,6 +483,12 @@ class Imdb(Auth):
         :param season: The season you want the detailed information for.
         :param offset: Offset episode results by this value.
         """
+        url, params = self._episodes_detailed_request(
+            imdb_id, season, limit, region, offset)
+        return await self._get(url, params=params)
+
+    def _episodes_detailed_request(self, imdb_id, season, limit, region,
+                                   offset):
         self.validate_imdb_id(imdb_id)
         if season < 1:
             raise ValueError('season must be greater than zero')
@@ -182,7 +503,49 @@ class Imdb(Auth):
 
         url = urljoin(BASE_URI,
                       '/template/imdb-ios-writable/tv-episodes-v2.jstl/render')
-        return await self._get(url, params=params)
+        return url, params
+
+    @logit
+    async def iter_title_episodes_detailed(self, imdb_id, season, limit=500,
+                                           region=None, offset=0):
+        """
+        Like `get_title_episodes_detailed`, but yield the episodes one by
+        one while the response is being received. The scheduler slot of the
+        request is held until the iteration ends.
+        """
+        url, params = self._episodes_detailed_request(
+            imdb_id, season, limit, region, offset)
+        async for _, episode in self._stream(url, [('episodes', )],
+                                             params=params):
+            yield episode
+
+    @logit
+    async def iter_title_credits(self, imdb_id, locale=None):
+        """
+        Like `get_title_credits`, but yield `(category, credit)` tuples one
+        by one while the response is being received. The scheduler slot of
+        the request is held until the iteration ends.
+        """
+        self.validate_imdb_id(imdb_id)
+        await self._redirection_title_check(imdb_id)
+        url = f'{BASE_URI}/title/{imdb_id}/fullcredits'
+        async for path, credit in self._stream(
+                url, [('resource', 'credits', WILDCARD)], locale=locale):
+            yield path[-1], credit
+
+    @logit
+    async def iter_title_releases(self, imdb_id, locale=None):
+        """
+        Like `get_title_releases`, but yield the release entries one by one
+        while the response is being received. The scheduler slot of the
+        request is held until the iteration ends.
+        """
+        self.validate_imdb_id(imdb_id)
+        await self._redirection_title_check(imdb_id)
+        url = f'{BASE_URI}/title/{imdb_id}/releases'
+        async for _, release in self._stream(
+                url, [('resource', 'releases')], locale=locale):
+            yield release
 
     async def get_title_top_crew(self, imdb_id):
         """
@@ -248,35 +611,115 @@ class Imdb(Auth):
             return True
         return False
 
-    async def _get_resource(self, path):
+    async def _get_resource(self, path, locale=None, auth_headers=None):
         url = f'{BASE_URI}{path}'
-        data = await self._get(url=url)
+        data = await self._get(url=url, locale=locale,
+                               auth_headers=auth_headers)
         return data['resource']
 
-    async def _get(self, url, query=None, params=None):
+    @staticmethod
+    def _endpoint_name(url):
+        if url.startswith(SEARCH_BASE_URI):
+            return 'search'
+        path = re.sub(r'/[a-z]{2}[0-9]{7,}', '/{imdb_id}', urlparse(url).path)
+        return _ENDPOINT_NAMES.get(path, path)
+
+    async def _get(self, url, query=None, params=None, locale=None,
+                   auth_headers=None):
         path = urlparse(url).path
         if params:
             path += '?' + urlencode(params)
-        headers = {'Accept-Language': self.locale}
-        headers.update(await self.get_auth_headers(path))
-
-        async with self.session.get(url, headers=headers, params=params) as r:
-            if not r.status == HTTPStatus.OK:
-                if r.status == HTTPStatus.NOT_FOUND:
-                    raise LookupError(f'Resource {path} not found')
-                else:
-                    msg = f'{r.status} {r.text}'
-                    raise ImdbAPIError(msg)
-            resp_data = await r.text(encoding='utf-8')
-        try:
-            resp_dict = json.loads(resp_data)
-        except ValueError:
-            resp_dict = self._parse_dirty_json(data=resp_data, query=query)
+        locale = locale or self.locale
+        cache_key = ResponseCache.make_key(url, params, locale)
+        resp_data = None
+        if self.response_cache is not None:
+            resp_data = self.response_cache.get(cache_key,
+                                                max_age=self.cache_ttl)
+        if resp_data is None:
+            resp_data = await self._request(url, path, params, locale,
+                                            cache_key, auth_headers)
+        if self.offload_threshold is not None and \
+                len(resp_data) >= self.offload_threshold:
+            resp_dict = await self._run_blocking(
+                self._decode, resp_data, query, executor=self._executor)
+        else:
+            with self._phase('decode'):
+                resp_dict = self._decode(resp_data, query)
 
         if resp_dict.get('error'):
             return None
         return resp_dict
 
+    async def _request(self, url, path, params, locale, cache_key,
+                       auth_headers=None):
+        headers = {'Accept-Language': locale}
+        headers.update(auth_headers or await self.get_auth_headers(path))
+
+        # queue for a slot before the resilience policy starts timing, so
+        # that the time spent queued neither times requests out nor trips
+        # breakers; a hedge is sent within the slot of its request
+        async with self._request_slot():
+            if self.resilience is None:
+                resp_data = await self._send(url, path, headers, params)
+            else:
+                resp_data = await self.resilience.call(
+                    host=urlparse(url).netloc,
+                    endpoint=self._endpoint_name(url),
+                    cache_key=cache_key,
+                    send=lambda: self._send(url, path, headers, params),
+                )
+        if self.response_cache is not None:
+            self.response_cache.set(cache_key, resp_data)
+        return resp_data
+
+    @classmethod
+    def _decode(cls, data, query=None):
+        try:
+            return json.loads(data)
+        except ValueError:
+            return cls._parse_dirty_json(data=data, query=query)
+
+    @staticmethod
+    def _check_status(response, path):
+        if not response.status == HTTPStatus.OK:
+            if response.status == HTTPStatus.NOT_FOUND:
+                raise LookupError(f'Resource {path} not found')
+            else:
+                msg = f'{response.status} {response.text}'
+                raise ImdbAPIError(msg)
+
+    async def _send(self, url, path, headers, params):
+        async with self.session.get(url, headers=headers,
+                                    params=params) as r:
+            self._check_status(r, path)
+            return await r.text(encoding='utf-8')
+
+    async def _stream(self, url, patterns, params=None, locale=None,
+                      chunk_size=65536):
+        # streamed responses are parsed as they arrive, so they bypass the
+        # resilience policy which needs the whole body to hedge or cache it;
+        # the slot stays held while the consumer handles items, so requests
+        # it sends meanwhile need another slot
+        path = urlparse(url).path
+        if params:
+            path += '?' + urlencode(params)
+        headers = {'Accept-Language': locale or self.locale}
+        headers.update(await self.get_auth_headers(path))
+
+        parser = JsonItemStream(patterns)
+        async with self._request_slot(), \
+                self.session.get(url, headers=headers, params=params) as r:
+            self._check_status(r, path)
+            try:
+                async for chunk in r.content.iter_chunked(chunk_size):
+                    with self._phase('decode'):
+                        items = parser.feed(chunk)
+                    for item in items:
+                        yield item
+                parser.close()
+            except ValueError as exc:
+                raise ImdbAPIError(f'Invalid response for {path}: {exc}')
+
     async def _redirection_title_check(self, imdb_id):
         if await self.is_redirection_title(imdb_id):
             self._title_not_found(msg=f'{imdb_id} is a redirection imdb id')
@@ -284,7 +727,8 @@ class Imdb(Auth):
     async def is_redirection_title(self, imdb_id):
         self.validate_imdb_id(imdb_id)
         page_url = f'https://www.imdb.com/title/{imdb_id}/'
-        async with self.session.head(page_url) as response:
+        async with self._request_slot(), \
+                self.session.head(page_url) as response:
             if response.status == HTTPStatus.MOVED_PERMANENTLY:
                 return True
             else:
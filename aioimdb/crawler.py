@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+import asyncio
+import base64
+import heapq
+import json
+import logging
+import math
+import os
+from collections import namedtuple
+
+import aiohttp
+
+from .exceptions import ImdbAPIError
+from .ids import (PREFIXES, compact_imdb_id, expand_imdb_id,
+                  extract_imdb_ids, split_imdb_id)
+
+logger = logging.getLogger(__name__)
+
+
+Edge = namedtuple('Edge', ['source', 'target', 'kind'])
+
+
+class IdBitset(object):
+    """
+    Set of imdb ids stored as one bit per id number, grown on demand, with a
+    separate bit array for every prefix tag of `aioimdb.ids` and digit count,
+    so that 'tt0111161' and 'tt00111161' are different members.
+
+    Ids of more than MAX_DIGITS digits, which would need bit arrays of
+    gigabytes, are rare and kept in a plain set instead.
+    """
+
+    MAX_DIGITS = 8
+
+    def __init__(self):
+        self._bits = {}
+        self._long_ids = set()
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @staticmethod
+    def _key(imdb_id):
+        tag, number = split_imdb_id(imdb_id)
+        return (tag, len(imdb_id) - 2), number
+
+    def __contains__(self, imdb_id):
+        if len(imdb_id) - 2 > self.MAX_DIGITS:
+            return compact_imdb_id(imdb_id) in self._long_ids
+        key, number = self._key(imdb_id)
+        bits = self._bits.get(key)
+        if bits is None or number >> 3 >= len(bits):
+            return False
+        return bool(bits[number >> 3] & (1 << (number & 7)))
+
+    def add(self, imdb_id):
+        """
+        Add `imdb_id` to the set. Return True if it was not already present.
+        """
+        if len(imdb_id) - 2 > self.MAX_DIGITS:
+            key = compact_imdb_id(imdb_id)
+            if key in self._long_ids:
+                return False
+            self._long_ids.add(key)
+            self._count += 1
+            return True
+        key, number = self._key(imdb_id)
+        bits = self._bits.setdefault(key, bytearray())
+        index, mask = number >> 3, 1 << (number & 7)
+        if index >= len(bits):
+            bits.extend(bytes(index - len(bits) + 1))
+        if bits[index] & mask:
+            return False
+        bits[index] |= mask
+        self._count += 1
+        return True
+
+    def to_dict(self):
+        return {
+            'count': self._count,
+            'bits': {
+                f'{PREFIXES[tag - 1]}{width}':
+                    base64.b64encode(bits).decode('ascii')
+                for (tag, width), bits in self._bits.items()
+            },
+            'long_ids': list(self._long_ids),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        bitset = cls()
+        bitset._count = data['count']
+        bitset._bits = {
+            (PREFIXES.index(key[:2]) + 1, int(key[2:])):
+                bytearray(base64.b64decode(bits))
+            for key, bits in data['bits'].items()
+        }
+        bitset._long_ids = set(data['long_ids'])
+        return bitset
+
+
+class Crawler(object):
+    """
+    Walk the title/name graph starting from a set of seed ids.
+
+    Titles are expanded through their similarities and connections, names
+    through their filmography. Discovered ids are kept in a priority
+    frontier, lower depth and higher parent degree first, capped to
+    `max_frontier` entries so that memory stays bounded however large the
+    graph is. Every id is fetched at most once.
+
+    Usage:
+
+        async with Imdb() as imdb:
+            crawler = Crawler(imdb, concurrency=20, checkpoint='crawl.json')
+            async for edge in crawler.crawl(['tt0111161']):
+                print(edge.source, edge.target, edge.kind)
+    """
+
+    TITLE_EDGES = (
+        ('similarities', 'get_title_similarities'),
+        ('connections', 'get_title_connections'),
+    )
+    NAME_EDGES = (
+        ('filmography', 'get_name_filmography'),
+    )
+
+    def __init__(self, imdb, concurrency=10, max_depth=None,
+                 max_frontier=100000, depth_weight=1.0, degree_weight=0.1,
+                 checkpoint=None, checkpoint_every=1000):
+        if concurrency < 1:
+            raise ValueError('concurrency must be greater than zero')
+        self.imdb = imdb
+        self.concurrency = concurrency
+        self.max_depth = max_depth
+        self.max_frontier = max_frontier
+        self.depth_weight = depth_weight
+        self.degree_weight = degree_weight
+        self.checkpoint = checkpoint
+        self.checkpoint_every = checkpoint_every
+
+        self.seen = IdBitset()
+        self.expanded = 0
+        self.dropped = 0
+        self.failed = 0
+        self._frontier = []
+        self._counter = 0
+        self._in_flight = {}
+
+    def _score(self, depth, degree):
+        return (depth * self.depth_weight -
+                math.log1p(degree) * self.degree_weight)
+
+    def _push(self, imdb_id, depth, degree=0):
+        if self.max_depth is not None and depth > self.max_depth:
+            return
+        if not self.seen.add(imdb_id):
+            return
+        self._counter += 1
+        # frontier ids are kept encoded, see `aioimdb.ids`
+        heapq.heappush(
+            self._frontier,
+            (self._score(depth, degree), self._counter,
+             compact_imdb_id(imdb_id), depth)
+        )
+        if len(self._frontier) > 2 * self.max_frontier:
+            self._trim_frontier()
+
+    def _trim_frontier(self):
+        # dropped ids stay in `seen`, trading completeness for bounded memory
+        self.dropped += len(self._frontier) - self.max_frontier
+        self._frontier = heapq.nsmallest(self.max_frontier, self._frontier)
+        heapq.heapify(self._frontier)
+
+    async def _expand(self, imdb_id, depth):
+        edges = []
+        kinds = self.TITLE_EDGES if imdb_id.startswith('tt') else \
+            self.NAME_EDGES
+        for kind, method in kinds:
+            try:
+                resource = await getattr(self.imdb, method)(imdb_id)
+            except (LookupError, ImdbAPIError, aiohttp.ClientError,
+                    asyncio.TimeoutError) as exc:
+                logger.warning('Unable to expand %s %s: %s',
+                               imdb_id, kind, exc)
+                self.failed += 1
+                continue
+            if not resource:
+                continue
+            for target in extract_imdb_ids(resource, prefixes=('tt', )):
+                if target != imdb_id:
+                    edges.append(Edge(imdb_id, target, kind))
+        return edges
+
+    async def crawl(self, seeds):
+        """
+        Crawl the graph from `seeds`, yielding an `Edge` for every
+        relationship found. If a checkpoint file exists the crawl resumes
+        from it and seeds already visited are ignored. Edges of a node whose
+        edges were only partly consumed are yielded again when resuming.
+        """
+        if self.checkpoint and os.path.exists(self.checkpoint):
+            self.load_checkpoint()
+        for seed in seeds:
+            self.imdb.validate_imdb_id(seed)
+            self._push(seed, 0)
+
+        pending = set()
+        since_checkpoint = 0
+        try:
+            while self._frontier or pending:
+                while self._frontier and len(pending) < self.concurrency:
+                    _, _, key, depth = heapq.heappop(self._frontier)
+                    imdb_id = expand_imdb_id(key)
+                    task = asyncio.ensure_future(self._expand(imdb_id, depth))
+                    self._in_flight[task] = (imdb_id, depth)
+                    pending.add(task)
+
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    _, depth = self._in_flight[task]
+                    edges = task.result()
+                    for edge in edges:
+                        self._push(edge.target, depth + 1, len(edges))
+                    for edge in edges:
+                        yield edge
+                    # the node stays in flight, and is checkpointed back to
+                    # the frontier, until all of its edges were yielded
+                    del self._in_flight[task]
+                    self.expanded += 1
+                    since_checkpoint += 1
+
+                if self.checkpoint and \
+                        since_checkpoint >= self.checkpoint_every:
+                    self.save_checkpoint()
+                    since_checkpoint = 0
+        finally:
+            for task in pending:
+                task.cancel()
+            if self.checkpoint:
+                self.save_checkpoint()
+            self._in_flight.clear()
+
+    def save_checkpoint(self):
+        """
+        Atomically write the crawl state to the checkpoint file. Ids being
+        fetched at the time are stored back in the frontier.
+        """
+        frontier = [[key, depth] for _, _, key, depth in self._frontier]
+        frontier.extend(
+            [compact_imdb_id(imdb_id), depth]
+            for imdb_id, depth in self._in_flight.values()
+        )
+        state = {
+            'frontier': frontier,
+            'seen': self.seen.to_dict(),
+            'expanded': self.expanded,
+            'dropped': self.dropped,
+            'failed': self.failed,
+        }
+        tmp_path = f'{self.checkpoint}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.checkpoint)
+
+    def load_checkpoint(self):
+        with open(self.checkpoint) as f:
+            state = json.load(f)
+        self.seen = IdBitset.from_dict(state['seen'])
+        self.expanded = state['expanded']
+        self.dropped = state['dropped']
+        self.failed = state['failed']
+        self._frontier = []
+        for key, depth in state['frontier']:
+            self._counter += 1
+            self._frontier.append(
+                (self._score(depth, 0), self._counter, key, depth))
+        heapq.heapify(self._frontier)
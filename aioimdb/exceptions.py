@@ -1,3 +1,11 @@
 # -*- coding: utf-8 -*-
 class ImdbAPIError(Exception):
     pass
+
+
+class ImdbDeadlineExceeded(ImdbAPIError):
+    pass
+
+
+class ImdbCircuitOpenError(ImdbAPIError):
+    pass
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+Bulk export of imdb resources across a pool of processes.
+
+    python -m aioimdb.export ids.txt output/ --processes 8 --method get_title
+"""
+from __future__ import absolute_import, unicode_literals
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .client import Imdb
+from .ids import compact_imdb_id
+
+logger = logging.getLogger(__name__)
+
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def _shard_name(index):
+    return f'shard-{index:05d}'
+
+
+def _write_json(path, data):
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_done_ids(path):
+    # encoded, as a shard of millions of ids would otherwise hold as many
+    # strings
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                done.add(compact_imdb_id(json.loads(line)['imdb_id']))
+            except (ValueError, KeyError):
+                # partial last line left by an interrupted worker
+                continue
+    return done
+
+
+async def _export_shard(client_class, imdb_kwargs, method, ids_path,
+                        out_path, concurrency, rate):
+    with open(ids_path) as f:
+        imdb_ids = list(dict.fromkeys(f.read().split()))
+    done = _read_done_ids(out_path)
+    todo = [imdb_id for imdb_id in imdb_ids
+            if compact_imdb_id(imdb_id) not in done]
+
+    semaphore = asyncio.Semaphore(concurrency)
+    interval = 1.0 / rate if rate else 0
+    next_slot = [time.monotonic()]
+    stats = {'written': 0, 'missing': 0, 'failed': 0}
+
+    async def fetch(imdb, imdb_id, out):
+        async with semaphore:
+            if interval:
+                now = time.monotonic()
+                delay = next_slot[0] - now
+                next_slot[0] = max(now, next_slot[0]) + interval
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            try:
+                data = await getattr(imdb, method)(imdb_id)
+            except LookupError:
+                data = None
+                stats['missing'] += 1
+            except Exception as exc:
+                # not recorded, so the id is retried when resuming
+                logger.warning('Failed to export %s: %s', imdb_id, exc)
+                stats['failed'] += 1
+                return
+        out.write(json.dumps({'imdb_id': imdb_id, 'data': data}) + '\n')
+        out.flush()
+        stats['written'] += 1
+
+    with open(out_path, 'a+') as out:
+        if out.tell():
+            out.seek(out.tell() - 1)
+            if out.read(1) != '\n':
+                # terminate a partial line left by an interrupted worker
+                out.write('\n')
+        async with client_class(**imdb_kwargs) as imdb:
+            await asyncio.gather(
+                *[fetch(imdb, imdb_id, out) for imdb_id in todo])
+    stats['done'] = len(done) + stats['written']
+    stats['total'] = len(imdb_ids)
+    return stats
+
+
+def _run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def _run_shard(*args):
+    # every worker process runs its own event loop and connection pool
+    return _run(_export_shard(*args))
+
+
+async def _prime_credentials(client_class, imdb_kwargs):
+    # credentials are cached on disk, so fetching them once here lets every
+    # worker process reuse them instead of each requesting its own
+    async with client_class(**imdb_kwargs) as imdb:
+        await imdb.get_auth_headers('/')
+
+
+def _create_manifest(output_dir, imdb_ids, method, shards):
+    manifest = {'method': method, 'shards': {}}
+    for index in range(shards):
+        shard_ids = imdb_ids[index::shards]
+        if not shard_ids:
+            continue
+        name = _shard_name(index)
+        with open(os.path.join(output_dir, f'{name}.ids'), 'w') as f:
+            f.write('\n'.join(shard_ids))
+        manifest['shards'][name] = {
+            'total': len(shard_ids), 'done': 0, 'complete': False,
+        }
+    _write_json(os.path.join(output_dir, MANIFEST_NAME), manifest)
+    return manifest
+
+
+def export(imdb_ids, output_dir, method='get_title', processes=None,
+           shards=None, concurrency=10, rate=None, imdb_kwargs=None,
+           client_class=Imdb, progress=None):
+    """
+    Export `method` results for `imdb_ids` to sharded JSONL files in
+    `output_dir`, one `{"imdb_id": ..., "data": ...}` line per id (`data` is
+    null for ids that were not found).
+
+    Ids are split into shards that are fetched by a pool of processes, each
+    with its own event loop and `Imdb` instance. A manifest records the
+    shards and their progress: calling `export` again on the same directory
+    resumes, fetching only the ids missing from the shard files.
+
+    :param imdb_ids: Imdb ids to export, duplicates are exported once.
+        Ignored when resuming.
+    :param output_dir: Directory for the manifest and shard files.
+    :param method: Name of the `Imdb` method to call for each id.
+    :param processes: Number of worker processes, defaults to the CPU count.
+    :param shards: Number of shards, defaults to four per process.
+    :param concurrency: Concurrent requests per process.
+    :param rate: Overall requests per second budget, split evenly between
+        processes.
+    :param imdb_kwargs: Keyword arguments for the `Imdb` constructor.
+    :param progress: Callable receiving the manifest after each shard.
+    """
+    processes = processes or os.cpu_count() or 1
+    imdb_kwargs = imdb_kwargs or {}
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        method = manifest['method']
+    else:
+        # every id is exported once, and shard totals count distinct ids
+        imdb_ids = list(dict.fromkeys(imdb_ids))
+        for imdb_id in imdb_ids:
+            client_class.validate_imdb_id(imdb_id)
+        manifest = _create_manifest(
+            output_dir, imdb_ids, method, shards or processes * 4)
+
+    pending = [name for name, shard in sorted(manifest['shards'].items())
+               if not shard['complete']]
+    if not pending:
+        return manifest
+
+    _run(_prime_credentials(client_class, imdb_kwargs))
+    process_rate = rate / processes if rate else None
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = {
+            executor.submit(
+                _run_shard, client_class, imdb_kwargs, method,
+                os.path.join(output_dir, f'{name}.ids'),
+                os.path.join(output_dir, f'{name}.jsonl'),
+                concurrency, process_rate): name
+            for name in pending
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            stats = future.result()
+            manifest['shards'][name].update(
+                done=stats['done'],
+                complete=stats['done'] == stats['total'],
+            )
+            _write_json(manifest_path, manifest)
+            logger.info('Exported %s: %s', name, stats)
+            if progress is not None:
+                progress(manifest)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Export imdb resources to sharded JSONL files.')
+    parser.add_argument('ids_file',
+                        help='file with one imdb id per line')
+    parser.add_argument('output_dir')
+    parser.add_argument('--method', default='get_title')
+    parser.add_argument('--processes', type=int)
+    parser.add_argument('--shards', type=int)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--rate', type=float,
+                        help='overall requests per second')
+    parser.add_argument('--locale')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    with open(args.ids_file) as f:
+        imdb_ids = f.read().split()
+
+    def report(manifest):
+        shards = manifest['shards'].values()
+        done = sum(shard['done'] for shard in shards)
+        total = sum(shard['total'] for shard in shards)
+        print(f'{done}/{total} ids exported')
+
+    export(imdb_ids, args.output_dir, method=args.method,
+           processes=args.processes, shards=args.shards,
+           concurrency=args.concurrency, rate=args.rate,
+           imdb_kwargs={'locale': args.locale}, progress=report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Compact integer encoding of imdb ids.
+
+An imdb id is a two letter prefix followed by at least seven digits. It is
+encoded as a 64 bit integer laid out as:
+
+    bits 56-63  prefix tag (see PREFIXES)
+    bits 48-55  number of digits, so that zero padding round-trips
+    bits  0-47  numeric part
+
+Integers hash faster and take a fraction of the memory of the equivalent
+strings, which matters for large visited sets and memo tables.
+"""
+from __future__ import absolute_import, unicode_literals
+import re
+from array import array
+
+
+PREFIXES = ('tt', 'nm', 'co', 'ch')
+
+_TAGS = {prefix: tag for tag, prefix in enumerate(PREFIXES, start=1)}
+_TAG_SHIFT = 56
+_WIDTH_SHIFT = 48
+_NUMBER_MASK = (1 << _WIDTH_SHIFT) - 1
+_WIDTH_MASK = 0xff
+_ID_RE = re.compile(r'([a-zA-Z]{2})([0-9]{7,14})\Z')
+_REFERENCE_RE = re.compile(r'\b(tt|nm|co|ch)([0-9]{7,})\b')
+
+
+def split_imdb_id(imdb_id):
+    """
+    Return the `(tag, number)` pair of `imdb_id`. Raise ValueError if the id
+    is not valid or its prefix is not one of PREFIXES.
+    """
+    try:
+        prefix, digits = _ID_RE.match(imdb_id).groups()
+        return _TAGS[prefix.lower()], int(digits)
+    except (AttributeError, TypeError, KeyError):
+        raise ValueError('invalid imdb id')
+
+
+def encode_imdb_id(imdb_id):
+    """
+    Encode `imdb_id` (e.g. 'tt0111161') into a tagged 64 bit integer.
+    """
+    try:
+        prefix, digits = _ID_RE.match(imdb_id).groups()
+        tag = _TAGS[prefix.lower()]
+    except (AttributeError, TypeError, KeyError):
+        raise ValueError('invalid imdb id')
+    return (tag << _TAG_SHIFT) | (len(digits) << _WIDTH_SHIFT) | int(digits)
+
+
+def decode_imdb_id(code):
+    """
+    Decode an integer produced by `encode_imdb_id` back into the imdb id.
+    """
+    tag = code >> _TAG_SHIFT
+    if not 1 <= tag <= len(PREFIXES):
+        raise ValueError('invalid encoded imdb id')
+    width = (code >> _WIDTH_SHIFT) & _WIDTH_MASK
+    return '{0}{1:0{2}d}'.format(
+        PREFIXES[tag - 1], code & _NUMBER_MASK, width)
+
+
+def compact_imdb_id(imdb_id):
+    """
+    Return `imdb_id` encoded with `encode_imdb_id` to be kept in a large
+    set or table, or unchanged if it cannot be encoded (e.g. an id of more
+    than 14 digits).
+    """
+    try:
+        return encode_imdb_id(imdb_id)
+    except ValueError:
+        return imdb_id
+
+
+def expand_imdb_id(key):
+    """
+    Return the imdb id of a key produced by `compact_imdb_id`.
+    """
+    return key if isinstance(key, str) else decode_imdb_id(key)
+
+
+def encode_imdb_ids(imdb_ids):
+    """
+    Encode an iterable of imdb ids into an `array('Q')` of 64 bit integers.
+    """
+    return array('Q', map(encode_imdb_id, imdb_ids))
+
+
+def decode_imdb_ids(codes):
+    """
+    Decode an iterable of encoded imdb ids (for example an `array('Q')`)
+    into a list of imdb id strings.
+    """
+    return list(map(decode_imdb_id, codes))
+
+
+def extract_imdb_ids(data, prefixes=('tt', 'nm')):
+    """
+    Walk a decoded API resource and return the imdb ids it references, in
+    order of first appearance and without duplicates.
+    """
+    found = []
+    seen = set()
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            stack.extend(reversed(list(item.values())))
+        elif isinstance(item, list):
+            stack.extend(reversed(item))
+        elif isinstance(item, str):
+            for match in _REFERENCE_RE.finditer(item):
+                imdb_id = match.group(0)
+                if match.group(1) in prefixes and imdb_id not in seen:
+                    seen.add(imdb_id)
+                    found.append(imdb_id)
+    return found
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+import codecs
+import json
+import re
+
+
+_STRUCTURAL_RE = re.compile(r'[{}\[\],:"]')
+_CLOSING_RE = re.compile(r'[}\]]')
+# the end of a buffer cut within a number, or within one of these literals
+_NUMBER_TAIL_RE = re.compile(r'[-+.eE0-9]*\Z')
+_LITERALS = ('true', 'false', 'null', 'NaN', 'Infinity', '-Infinity')
+_DECODER = json.JSONDecoder()
+
+WILDCARD = '*'
+
+
+def _is_truncated(text, error):
+    """
+    Return True if decoding `text` failed because it ends too early rather
+    than because it is malformed.
+    """
+    rest = text[error.pos:]
+    if not rest or error.msg.startswith('Unterminated string'):
+        return True
+    if error.msg.startswith('Invalid \\uXXXX escape'):
+        return len(rest) < 6
+    return bool(_NUMBER_TAIL_RE.match(rest)) or \
+        any(literal.startswith(rest) for literal in _LITERALS)
+
+
+class _Frame(object):
+    __slots__ = ('is_object', 'path', 'key', 'expect_key', 'selected')
+
+    def __init__(self, is_object, path, selected):
+        self.is_object = is_object
+        self.path = path
+        self.key = None
+        self.expect_key = is_object
+        self.selected = selected
+
+
+class JsonItemStream(object):
+    """
+    Incremental JSON parser emitting the items of selected arrays as soon as
+    each one has been received, so that memory use is bounded by the size of
+    an item rather than of the whole document.
+
+    Arrays are selected by the path of object keys leading to them, where
+    `WILDCARD` matches any key. Items that are objects or arrays are emitted
+    as `(path, item)` tuples, other values of selected arrays are skipped.
+    Malformed items raise ValueError, and `close()` raises it if the
+    document was truncated.
+
+    Usage:
+
+        stream = JsonItemStream([('resource', 'credits', WILDCARD)])
+        for chunk in chunks:
+            for path, credit in stream.feed(chunk):
+                print(path[-1], credit)
+        stream.close()
+    """
+
+    def __init__(self, patterns):
+        self.patterns = [tuple(pattern) for pattern in patterns]
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._stack = []
+        # an incomplete item is only decoded again once a closing bracket
+        # arrived, until then chunks are set aside rather than concatenated
+        self._waiting = False
+        self._pending = []
+
+    def _matches(self, path):
+        for pattern in self.patterns:
+            if len(pattern) == len(path) and all(
+                expected == WILDCARD or expected == key
+                for expected, key in zip(pattern, path)
+            ):
+                return True
+        return False
+
+    def _push(self, is_object):
+        if not self._stack:
+            path = ()
+        else:
+            top = self._stack[-1]
+            key = top.key if top.is_object else WILDCARD
+            path = top.path + (key, )
+        self._stack.append(_Frame(
+            is_object, path, not is_object and self._matches(path)))
+
+    def feed(self, chunk):
+        """
+        Parse the next chunk of the document and return the list of
+        `(path, item)` tuples completed by it.
+        """
+        text = self._decoder.decode(chunk)
+        if self._waiting and not _CLOSING_RE.search(text):
+            self._pending.append(text)
+            return []
+        buffer = ''.join([self._buffer] + self._pending + [text])
+        self._pending = []
+        self._waiting = False
+        items = []
+        pos = 0
+        stack = self._stack
+        while True:
+            match = _STRUCTURAL_RE.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            pos = match.start()
+            char = buffer[pos]
+
+            if char == '"':
+                end = pos + 1
+                while True:
+                    end = buffer.find('"', end)
+                    if end == -1:
+                        break
+                    backslashes = 0
+                    while buffer[end - 1 - backslashes] == '\\':
+                        backslashes += 1
+                    if backslashes % 2 == 0:
+                        break
+                    end += 1
+                if end == -1:
+                    # the string continues in the next chunk
+                    break
+                top = stack[-1] if stack else None
+                if top is not None and top.is_object and top.expect_key:
+                    top.key = json.loads(buffer[pos:end + 1])
+                pos = end + 1
+            elif char in '{[':
+                if stack and stack[-1].selected:
+                    # decode the whole item at once, or wait for the rest
+                    # of it if it is not complete yet
+                    try:
+                        item, pos = _DECODER.raw_decode(buffer, pos)
+                    except json.JSONDecodeError as exc:
+                        if not _is_truncated(buffer, exc):
+                            raise
+                        self._waiting = True
+                        break
+                    items.append((stack[-1].path, item))
+                    continue
+                self._push(char == '{')
+                pos += 1
+            elif not stack:
+                raise ValueError(f'unexpected {char!r} outside of a value')
+            elif char == ':':
+                stack[-1].expect_key = False
+                pos += 1
+            elif char == ',':
+                if stack[-1].is_object:
+                    stack[-1].expect_key = True
+                pos += 1
+            else:  # '}' ']'
+                if stack.pop().is_object != (char == '}'):
+                    raise ValueError(f'mismatched {char!r}')
+                pos += 1
+
+        # drop what was consumed, keeping an item or string being received
+        self._buffer = buffer[pos:]
+        return items
+
+    def close(self):
+        """
+        Check that the whole document was received, raising ValueError if
+        it was truncated.
+        """
+        buffer = ''.join([self._buffer] + self._pending +
+                         [self._decoder.decode(b'', final=True)])
+        if self._stack or buffer.strip():
+            raise ValueError('truncated JSON document')
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+import asyncio
+import time
+from collections import Counter, deque, namedtuple
+from contextlib import contextmanager
+
+Stall = namedtuple('Stall', ['at', 'lag', 'phase', 'phases'])
+
+# phase blamed for stalls during which no client phase ran on the loop
+OTHER = 'other'
+
+
+class LoopLagMonitor(object):
+    """
+    Measure the event loop lag by checking how late a periodic timer fires,
+    and attribute lags over `threshold` seconds to the client phase that
+    spent the most time on the loop during the late interval.
+
+    The client reports its synchronous phases (signing, decoding, reading
+    credentials) through `phase()`. Stalls that no client phase accounts for
+    at least half of are attributed to `OTHER`, that is to the application
+    or to the http library.
+
+    Usage:
+
+        monitor = LoopLagMonitor(threshold=0.02)
+        async with Imdb(monitor=monitor) as imdb:
+            await asyncio.gather(*[imdb.get_title(i) for i in imdb_ids])
+            print(monitor.metrics())
+    """
+
+    def __init__(self, interval=0.05, threshold=0.05, history=100):
+        self.interval = interval
+        self.threshold = threshold
+        self.samples = 0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self.stalls = deque(maxlen=history)
+        self._stall_counts = Counter()
+        self._stall_lags = Counter()
+        self._window = Counter()
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """
+        Start sampling on the running loop, if not sampling already.
+        """
+        if not self.running:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Account the time spent running the block to the phase `name`.
+        """
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._window[name] += time.monotonic() - started
+
+    def _sample(self, lag):
+        self.samples += 1
+        self.total_lag += lag
+        self.max_lag = max(self.max_lag, lag)
+        if lag >= self.threshold:
+            phase = OTHER
+            if self._window:
+                top, spent = self._window.most_common(1)[0]
+                if spent >= lag / 2:
+                    phase = top
+            self._stall_counts[phase] += 1
+            self._stall_lags[phase] += lag
+            self.stalls.append(Stall(time.time(), lag, phase,
+                                     dict(self._window)))
+        self._window = Counter()
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._sample(max(time.monotonic() - started - self.interval, 0))
+
+    def metrics(self):
+        """
+        Return the number of samples, the mean and maximum lag, and the
+        count and total lag of stalls by phase.
+        """
+        return {
+            'samples': self.samples,
+            'mean_lag': self.total_lag / self.samples
+            if self.samples else 0.0,
+            'max_lag': self.max_lag,
+            'stalls': {
+                phase: {'count': count, 'lag': self._stall_lags[phase]}
+                for phase, count in self._stall_counts.items()
+            },
+        }
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+import asyncio
+import logging
+import time
+from collections import deque
+
+from .cache import ResponseCache
+from .client import ENDPOINT_TIMEOUTS
+from .exceptions import ImdbAPIError, ImdbCircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker(object):
+    """
+    Track the outcome of recent requests to a host and fail fast while the
+    error rate is too high.
+
+    The breaker opens when at least `min_requests` requests were made in the
+    last `window` seconds and `failure_threshold` of them failed. After
+    `reset_timeout` seconds a single probe request is let through: the
+    breaker closes again if it succeeds and stays open otherwise. Only the
+    outcome of the probe itself, passed with `probe=True`, can close or
+    reopen the breaker.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+    # returned by `allow` for the probe request
+    PROBE = 'probe'
+
+    def __init__(self, failure_threshold=0.5, min_requests=20, window=30,
+                 reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.min_requests = min_requests
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._opened_at = None
+        self._probing = False
+        self._outcomes = deque()
+        self._failures = 0
+
+    def _prune(self, now):
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            _, ok = self._outcomes.popleft()
+            if not ok:
+                self._failures -= 1
+
+    def allow(self):
+        """
+        Return True if a request may be sent now, `PROBE` if it may be sent
+        as the probe of a half-open breaker, and False otherwise.
+        """
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and \
+                time.monotonic() - self._opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return self.PROBE
+        return False
+
+    def abandon(self, probe=False):
+        """
+        Forget a request that was cancelled before it completed.
+        """
+        if probe:
+            self._probing = False
+
+    def record(self, ok, probe=False):
+        now = time.monotonic()
+        if probe:
+            self._probing = False
+            if ok:
+                self.state = self.CLOSED
+                self._outcomes.clear()
+                self._failures = 0
+            else:
+                self.state = self.OPEN
+                self._opened_at = now
+            return
+        if self.state == self.HALF_OPEN:
+            # sent before the breaker opened, says nothing about recovery
+            return
+
+        self._outcomes.append((now, ok))
+        if not ok:
+            self._failures += 1
+        self._prune(now)
+        if (
+            self.state == self.CLOSED and
+            len(self._outcomes) >= self.min_requests and
+            self._failures >= self.failure_threshold * len(self._outcomes)
+        ):
+            logger.warning('Circuit breaker opened, %s of %s requests failed',
+                           self._failures, len(self._outcomes))
+            self.state = self.OPEN
+            self._opened_at = now
+
+
+class LatencyTracker(object):
+    """
+    Keep the last `size` latencies of an endpoint to estimate percentiles.
+    """
+
+    def __init__(self, size=200, min_samples=20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=size)
+
+    def add(self, seconds):
+        self._samples.append(seconds)
+
+    def percentile(self, percent):
+        """
+        Return the `percent` percentile in seconds, or None while fewer than
+        `min_samples` latencies were recorded.
+        """
+        if len(self._samples) < self.min_samples:
+            return None
+        samples = sorted(self._samples)
+        index = min(len(samples) - 1, int(len(samples) * percent / 100))
+        return samples[index]
+
+
+class ResiliencePolicy(object):
+    """
+    Per-host circuit breakers, per-endpoint timeouts and hedged requests for
+    the client GET requests.
+
+    A request that has not completed after the endpoint's observed p95
+    latency is duplicated and the first successful response is used, as
+    long as fewer than `hedge_ratio` of all requests have been hedged.
+    While a host's breaker is open, the last good response for the same
+    request is returned if `serve_stale` is set, otherwise
+    `ImdbCircuitOpenError` is raised.
+
+    Usage:
+
+        policy = ResiliencePolicy(timeouts={'get_title_credits': 20})
+        async with Imdb(resilience=policy) as imdb:
+            credits = await imdb.get_title_credits('tt0111161')
+    """
+
+    def __init__(self, timeouts=None, default_timeout=10, hedge=True,
+                 hedge_percentile=95, hedge_ratio=0.1, serve_stale=True,
+                 stale_cache_size=1024, breaker_options=None):
+        self.timeouts = dict(ENDPOINT_TIMEOUTS)
+        self.timeouts.update(timeouts or {})
+        self.default_timeout = default_timeout
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_ratio = hedge_ratio
+        self.serve_stale = serve_stale
+        self.stale_cache = ResponseCache(maxsize=stale_cache_size)
+        self.breaker_options = breaker_options or {}
+        self.requests = 0
+        self.hedged = 0
+        self._breakers = {}
+        self._latencies = {}
+
+    def breaker(self, host):
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(**self.breaker_options)
+        return self._breakers[host]
+
+    def latency(self, endpoint):
+        if endpoint not in self._latencies:
+            self._latencies[endpoint] = LatencyTracker()
+        return self._latencies[endpoint]
+
+    def _hedge_delay(self, endpoint):
+        if not self.hedge or self.hedged + 1 > self.hedge_ratio * \
+                self.requests:
+            return None
+        return self.latency(endpoint).percentile(self.hedge_percentile)
+
+    async def _hedged(self, endpoint, send):
+        delay = self._hedge_delay(endpoint)
+        if delay is None:
+            return await send()
+
+        tasks = {asyncio.ensure_future(send())}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done and self._hedge_delay(endpoint) is not None:
+                self.hedged += 1
+                tasks.add(asyncio.ensure_future(send()))
+            pending = tasks
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                # prefer a success when both requests completed together
+                for task in sorted(done, key=lambda t: bool(t.exception())):
+                    exc = task.exception()
+                    if exc is None or isinstance(exc, LookupError) or \
+                            not pending:
+                        return task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def call(self, host, endpoint, cache_key, send):
+        """
+        Return the result of the `send` coroutine function, applying the
+        policy for `host` and `endpoint`.
+        """
+        breaker = self.breaker(host)
+        allowed = breaker.allow()
+        probe = allowed == CircuitBreaker.PROBE
+        if not allowed:
+            stale = self.stale_cache.get(cache_key)
+            if self.serve_stale and stale is not None:
+                return stale
+            raise ImdbCircuitOpenError(f'Circuit breaker open for {host}')
+
+        self.requests += 1
+        timeout = self.timeouts.get(endpoint, self.default_timeout)
+        start = time.monotonic()
+        try:
+            result = await asyncio.wait_for(
+                self._hedged(endpoint, send), timeout)
+        except asyncio.CancelledError:
+            breaker.abandon(probe)
+            raise
+        except LookupError:
+            breaker.record(True, probe)
+            raise
+        except asyncio.TimeoutError:
+            breaker.record(False, probe)
+            raise ImdbAPIError(
+                f'Request to {endpoint} timed out after {timeout}s')
+        except Exception:
+            breaker.record(False, probe)
+            raise
+        breaker.record(True, probe)
+        self.latency(endpoint).add(time.monotonic() - start)
+        self.stale_cache.set(cache_key, result)
+        return result
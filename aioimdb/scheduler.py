@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+from .exceptions import ImdbDeadlineExceeded
+
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BULK = 2
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_NORMAL, PRIORITY_BULK)
+
+DEFAULT_TENANT = 'default'
+
+_request_options = ContextVar('aioimdb_request_options', default=None)
+
+
+@contextmanager
+def scheduling(priority=PRIORITY_NORMAL, tenant=DEFAULT_TENANT,
+               timeout=None):
+    """
+    Set the scheduling options of the client requests made within the block,
+    including those made by tasks created within it.
+    :param priority: One of PRIORITY_INTERACTIVE, PRIORITY_NORMAL or
+        PRIORITY_BULK.
+    :param tenant: Name of the tenant requests are queued fairly against.
+    :param timeout: Seconds from now after which requests that are still
+        queued are cancelled with `ImdbDeadlineExceeded`.
+    """
+    if priority not in PRIORITIES:
+        raise ValueError('invalid priority')
+    deadline = None
+    if timeout is not None:
+        deadline = time.monotonic() + timeout
+    token = _request_options.set((priority, tenant, deadline))
+    try:
+        yield
+    finally:
+        _request_options.reset(token)
+
+
+class RequestScheduler(object):
+    """
+    Limit the number of concurrent client requests, dispatching queued ones
+    by priority class and round robin between tenants within a class.
+
+    Requests of lower priority can only use `max_concurrency -
+    reserved_interactive` slots, keeping some capacity free for interactive
+    requests however busy background jobs keep the client.
+
+    Usage:
+
+        imdb = Imdb(scheduler=RequestScheduler(max_concurrency=20,
+                                               reserved_interactive=5))
+        with scheduling(priority=PRIORITY_INTERACTIVE, timeout=2):
+            title = await imdb.get_title('tt0111161')
+    """
+
+    def __init__(self, max_concurrency=10, reserved_interactive=0):
+        if max_concurrency < 1:
+            raise ValueError('max_concurrency must be greater than zero')
+        if not 0 <= reserved_interactive < max_concurrency:
+            raise ValueError(
+                'reserved_interactive must be between zero and '
+                'max_concurrency')
+        self.max_concurrency = max_concurrency
+        self.reserved_interactive = reserved_interactive
+        self.in_flight = 0
+        self.dispatched = 0
+        self.expired = 0
+        self._queues = {priority: OrderedDict() for priority in PRIORITIES}
+
+    def _has_capacity(self, priority):
+        limit = self.max_concurrency
+        if priority != PRIORITY_INTERACTIVE:
+            limit -= self.reserved_interactive
+        return self.in_flight < limit
+
+    def _is_queued(self, priority):
+        return any(self._queues[other]
+                   for other in PRIORITIES if other <= priority)
+
+    def _grant(self):
+        self.in_flight += 1
+        self.dispatched += 1
+
+    def _release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        now = time.monotonic()
+        for priority in PRIORITIES:
+            tenants = self._queues[priority]
+            while tenants and self._has_capacity(priority):
+                tenant, waiters = next(iter(tenants.items()))
+                future, deadline = waiters.popleft()
+                if waiters:
+                    tenants.move_to_end(tenant)
+                else:
+                    del tenants[tenant]
+                if future.done():
+                    continue
+                if deadline is not None and deadline <= now:
+                    self.expired += 1
+                    future.set_exception(ImdbDeadlineExceeded(
+                        'Deadline passed while the request was queued'))
+                    continue
+                self._grant()
+                future.set_result(None)
+            if not self._has_capacity(priority):
+                break
+
+    async def _acquire(self, priority, tenant, deadline):
+        timeout = None
+        if deadline is not None:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                self.expired += 1
+                raise ImdbDeadlineExceeded('Deadline passed before sending')
+        if self._has_capacity(priority) and not self._is_queued(priority):
+            self._grant()
+            return
+
+        future = asyncio.get_event_loop().create_future()
+        tenants = self._queues[priority]
+        tenants.setdefault(tenant, deque()).append((future, deadline))
+        # the queue may only hold abandoned entries, so dispatch right away
+        self._dispatch()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if future.done() and not future.cancelled() and \
+                    future.exception() is None:
+                # granted just as the wait ended, hand the slot back
+                self._release()
+            future.cancel()
+            if isinstance(exc, asyncio.TimeoutError):
+                self.expired += 1
+                raise ImdbDeadlineExceeded(
+                    'Deadline passed while the request was queued')
+            raise
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Hold one request slot for the duration of the block, using the
+        options set by `scheduling` for the current context.
+        """
+        priority, tenant, deadline = \
+            _request_options.get() or (PRIORITY_NORMAL, DEFAULT_TENANT, None)
+        await self._acquire(priority, tenant, deadline)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def metrics(self):
+        """
+        Return a dict with the current queue depths, per priority and
+        tenant, and the scheduler counters.
+        """
+        return {
+            'in_flight': self.in_flight,
+            'max_concurrency': self.max_concurrency,
+            'dispatched': self.dispatched,
+            'expired': self.expired,
+            'queued': {
+                priority: {
+                    tenant: sum(1 for future, _ in waiters
+                                if not future.done())
+                    for tenant, waiters in tenants.items()
+                }
+                for priority, tenants in self._queues.items()
+            },
+        }
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+import asyncio
+import time
+from collections import OrderedDict, deque, namedtuple
+
+from .utils import aiterate
+
+
+SearchResult = namedtuple('SearchResult', ['query', 'normalized', 'results',
+                                           'error'])
+
+
+class BatchSearch(object):
+    """
+    Search for a stream of queries, sending one request per distinct
+    normalized query and fanning the results back out to every input.
+
+    Results are yielded as a `SearchResult` per input query, in input order
+    if `ordered` is set or as soon as they are available otherwise. Queries
+    that fail carry the exception in `error` instead of stopping the batch.
+    Results of duplicate queries are the same list object. At most
+    `dedup_size` completed queries are remembered for deduplication, on top
+    of the at most `window` queries in flight.
+
+    Usage:
+
+        async with Imdb() as imdb:
+            batch = BatchSearch(imdb, concurrency=20)
+            async for result in batch.run(partner_feed()):
+                print(result.query, result.results, result.error)
+            print(batch.stats())
+    """
+
+    def __init__(self, imdb, kind='title', concurrency=10, ordered=True,
+                 window=1000, dedup_size=100000, locale=None):
+        if kind not in ('title', 'name'):
+            raise ValueError('kind must be "title" or "name"')
+        if concurrency < 1:
+            raise ValueError('concurrency must be greater than zero')
+        self.imdb = imdb
+        self.kind = kind
+        self.concurrency = concurrency
+        self.ordered = ordered
+        self.window = max(window, 1)
+        self.dedup_size = dedup_size
+        self.locale = locale
+        self.queries = 0
+        self.unique = 0
+        self.errors = 0
+        self._elapsed = 0.0
+        self._semaphore = None
+        self._tasks = OrderedDict()
+
+    async def _search(self, normalized):
+        method = self.imdb.search_for_title if self.kind == 'title' else \
+            self.imdb.search_for_name
+        async with self._semaphore:
+            try:
+                return await method(normalized, locale=self.locale), None
+            except Exception as exc:
+                return None, exc
+
+    def _task_for(self, normalized):
+        task = self._tasks.get(normalized)
+        if task is not None:
+            self._tasks.move_to_end(normalized)
+            return task
+        self.unique += 1
+        task = asyncio.ensure_future(self._search(normalized))
+        self._tasks[normalized] = task
+        excess = len(self._tasks) - self.dedup_size
+        if excess > 0:
+            # only forget queries that already completed, searches in flight
+            # are still needed for their duplicates and bounded by `window`
+            forgotten = []
+            for query, query_task in self._tasks.items():
+                if len(forgotten) == excess:
+                    break
+                if query_task.done():
+                    forgotten.append(query)
+            for query in forgotten:
+                del self._tasks[query]
+        return task
+
+    def _result(self, query, normalized, task):
+        results, error = task.result()
+        if error is not None:
+            self.errors += 1
+        return SearchResult(query, normalized, results, error)
+
+    async def run(self, queries):
+        """
+        Search for an iterable, or async iterable, of query strings.
+        """
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.monotonic()
+        try:
+            if self.ordered:
+                async for result in self._run_ordered(queries):
+                    yield result
+            else:
+                async for result in self._run_unordered(queries):
+                    yield result
+        finally:
+            self._elapsed += time.monotonic() - started
+            for task in self._tasks.values():
+                task.cancel()
+            self._tasks.clear()
+
+    async def _run_ordered(self, queries):
+        pending = deque()
+        async for query in aiterate(queries):
+            self.queries += 1
+            normalized = self.imdb._normalize_query(query)
+            pending.append((query, normalized, self._task_for(normalized)))
+            if len(pending) >= self.window:
+                await pending[0][2]
+            while pending and pending[0][2].done():
+                yield self._result(*pending.popleft())
+        while pending:
+            await pending[0][2]
+            yield self._result(*pending.popleft())
+
+    async def _run_unordered(self, queries):
+        waiters = {}
+        ready = deque()
+        outstanding = 0
+        async for query in aiterate(queries):
+            self.queries += 1
+            normalized = self.imdb._normalize_query(query)
+            task = self._task_for(normalized)
+            if task.done():
+                yield self._result(query, normalized, task)
+                continue
+            if task not in waiters:
+                waiters[task] = []
+                task.add_done_callback(ready.append)
+            waiters[task].append((query, normalized))
+            outstanding += 1
+            if outstanding >= self.window:
+                await asyncio.wait(set(waiters),
+                                   return_when=asyncio.FIRST_COMPLETED)
+            while ready:
+                task = ready.popleft()
+                for query, normalized in waiters.pop(task, ()):
+                    outstanding -= 1
+                    yield self._result(query, normalized, task)
+        while waiters:
+            if not ready:
+                await asyncio.wait(set(waiters),
+                                   return_when=asyncio.FIRST_COMPLETED)
+            while ready:
+                task = ready.popleft()
+                for query, normalized in waiters.pop(task, ()):
+                    yield self._result(query, normalized, task)
+
+    def stats(self):
+        """
+        Return the number of queries and distinct queries searched, the
+        dedup ratio (share of queries answered without a request), the
+        error count and the throughput in queries per second.
+        """
+        return {
+            'queries': self.queries,
+            'unique': self.unique,
+            'dedup_ratio': 1 - self.unique / self.queries
+            if self.queries else 0.0,
+            'errors': self.errors,
+            'elapsed': self._elapsed,
+            'throughput': self.queries / self._elapsed
+            if self._elapsed else 0.0,
+        }
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, unicode_literals
+import asyncio
+import concurrent.futures
+import inspect
+import threading
+from functools import wraps
+
+from .client import Imdb
+
+_DONE = object()
+
+
+class SyncImdb(object):
+    """
+    Thread-safe synchronous facade over `Imdb` for non async callers.
+
+    One event loop runs for the lifetime of the facade in a background
+    thread and owns a single `Imdb` instance, so that the connection pool is
+    reused across calls. Every coroutine method of `Imdb`, including the
+    `ENDPOINTS` methods, is available as a blocking method, and every
+    async generator method (such as `iter_title_credits`) as a generator.
+
+    Usage:
+
+        with SyncImdb(locale='en_US') as imdb:
+            title = imdb.get_title('tt0111161')
+            plots = imdb.bulk([('get_title_plot', 'tt0111161'),
+                               ('get_title_plot', 'tt0068646')])
+    """
+
+    def __init__(self, *args, client_class=Imdb, timeout=None, **kwargs):
+        self.timeout = timeout
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run_loop, name='aioimdb-sync', daemon=True)
+        self._thread.start()
+        self._imdb = None
+        try:
+            self._imdb = self._run(self._create(client_class, args, kwargs))
+        except BaseException:
+            self._stop_loop()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, etype, evalue, etb):
+        self.close()
+
+    def __getattr__(self, name):
+        attr = getattr(self._imdb, name)
+        if not callable(attr):
+            return attr
+
+        @wraps(attr)
+        def method(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if asyncio.iscoroutine(result):
+                return self._run(result)
+            if inspect.isasyncgen(result):
+                return self._iterate(result)
+            return result
+        return method
+
+    def _iterate(self, agen):
+        async def next_item():
+            try:
+                return await agen.__anext__()
+            except StopAsyncIteration:
+                return _DONE
+
+        try:
+            while True:
+                item = self._run(next_item())
+                if item is _DONE:
+                    return
+                yield item
+        finally:
+            if not self._loop.is_closed():
+                self._run(agen.aclose())
+
+    @staticmethod
+    async def _create(client_class, args, kwargs):
+        # the client, and its session, must be created within the loop
+        return client_class(*args, **kwargs)
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def _run(self, coro):
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        try:
+            return future.result(self.timeout)
+        except concurrent.futures.TimeoutError:
+            # do not leave the call running on the loop
+            future.cancel()
+            raise
+
+    def _stop_loop(self):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def bulk(self, calls, return_exceptions=False):
+        """
+        Run many client calls concurrently and return their results in
+        order.
+        :param calls: Iterable of `(method_name, *args)` tuples, where the
+            last item may be a dict of keyword arguments.
+        :param return_exceptions: Return exceptions in place of results
+            instead of raising the first one.
+        """
+        coros = []
+        for name, *args in calls:
+            kwargs = {}
+            if args and isinstance(args[-1], dict):
+                kwargs = args.pop()
+            coros.append(getattr(self._imdb, name)(*args, **kwargs))
+
+        async def gather():
+            return await asyncio.gather(
+                *coros, return_exceptions=return_exceptions)
+        return self._run(gather())
+
+    def close(self):
+        """
+        Close the client session and stop the background event loop.
+        """
+        if self._loop.is_closed():
+            return
+        self._run(self._imdb.__aexit__(None, None, None))
+        self._stop_loop()
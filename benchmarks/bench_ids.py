@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Compare memory use and hashing speed of imdb id sets stored as strings and
+as integers encoded with `aioimdb.ids`.
+
+    PYTHONPATH=. python benchmarks/bench_ids.py --count 10000000
+
+Run it from the repository root, or drop `PYTHONPATH=.` once aioimdb is
+installed (e.g. with `pip install -e .`).
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from aioimdb.ids import encode_imdb_ids
+
+
+def _measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def _lookup(items, probes):
+    start = time.perf_counter()
+    hits = sum(1 for probe in probes if probe in items)
+    return hits, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=10000000)
+    args = parser.parse_args()
+    numbers = range(args.count)
+
+    # both sets are built from freshly created objects, so the measured
+    # memory includes the id objects themselves and not only the hash table
+    str_set, str_bytes = _measure(
+        lambda: {f'tt{number:07d}' for number in numbers})
+    # fresh string objects so that cached string hashes do not skew timings
+    str_probes = [f'tt{number:07d}' for number in numbers]
+    _, str_lookup = _lookup(str_set, str_probes)
+    del str_set, str_probes
+
+    codes = encode_imdb_ids(f'tt{number:07d}' for number in numbers)
+    int_set, int_bytes = _measure(lambda: set(codes))
+    int_probes = list(codes)
+    _, int_lookup = _lookup(int_set, int_probes)
+    del int_set, int_probes
+
+    print(f'{args.count} ids')
+    print(f'{"":12} {"memory MiB":>12} {"lookup s":>10}')
+    for name, size, lookup in [
+        ('set(str)', str_bytes, str_lookup),
+        ('set(int)', int_bytes, int_lookup),
+    ]:
+        print(f'{name:12} {size / 2 ** 20:12.1f} {lookup:10.2f}')
+    print(f'{"array(Q)":12} {codes.itemsize * len(codes) / 2 ** 20:12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Compare peak memory of buffered and streamed parsing of large fullcredits
+responses fetched concurrently from a local server.
+
+    PYTHONPATH=. python benchmarks/bench_stream.py --concurrency 20 \\
+        --cast 10000
+
+Run it from the repository root, or drop `PYTHONPATH=.` once aioimdb is
+installed (e.g. with `pip install -e .`).
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from aioimdb import Imdb
+from aioimdb.jsonstream import WILDCARD
+
+PATTERNS = [('resource', 'credits', WILDCARD)]
+
+
+class LocalImdb(Imdb):
+
+    async def get_auth_headers(self, url_path):
+        return {}
+
+
+def _document(cast_size):
+    cast = [
+        {
+            'id': f'/name/nm{number:07d}/',
+            'name': f'Actor number {number}',
+            'characters': [f'Character {number}'],
+            'image': {'url': f'https://example.com/{number}.jpg',
+                      'height': 400, 'width': 300},
+        }
+        for number in range(cast_size)
+    ]
+    return json.dumps({'resource': {'credits': {'cast': cast}}}).encode()
+
+
+async def _buffered(imdb, url):
+    data = await imdb._get(url)
+    return len(data['resource']['credits']['cast'])
+
+
+async def _streamed(imdb, url):
+    count = 0
+    async for _ in imdb._stream(url, PATTERNS):
+        count += 1
+    return count
+
+
+async def _measure(mode, url, concurrency):
+    async with LocalImdb() as imdb:
+        tracemalloc.start()
+        start = time.perf_counter()
+        counts = await asyncio.gather(
+            *[mode(imdb, url) for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return peak, elapsed, sum(counts)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--cast', type=int, default=10000)
+    args = parser.parse_args()
+
+    body = _document(args.cast)
+
+    async def fullcredits(request):
+        return web.Response(body=body, content_type='application/json')
+
+    app = web.Application()
+    app.router.add_get('/title/tt0111161/fullcredits', fullcredits)
+    async with TestServer(app) as server:
+        url = str(server.make_url('/title/tt0111161/fullcredits'))
+        print(f'{args.concurrency} concurrent responses of '
+              f'{len(body) / 2 ** 20:.1f} MiB')
+        print(f'{"":10} {"peak MiB":>10} {"seconds":>10} {"items":>10}')
+        for name, mode in [('buffered', _buffered), ('streamed', _streamed)]:
+            peak, elapsed, items = await _measure(
+                mode, url, args.concurrency)
+            print(f'{name:10} {peak / 2 ** 20:10.1f} {elapsed:10.2f} '
+                  f'{items:10d}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
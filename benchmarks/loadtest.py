@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+"""
+Replay a production-like traffic mix against a local stand-in for the IMDb
+hosts and report, for each concurrency level of a sweep, the throughput,
+latency distribution, connections opened, memory growth and event loop lag
+of the client.
+
+The stand-in runs in a separate process and emulates api.imdbws.com
+(credentials and resources), the v2.sg.media-imdb.com suggestion host and
+the www.imdb.com HEAD redirection checks. Ids are drawn with Zipfian
+popularity, so cache and pooling options can be compared on a realistic
+working set. As every host is served from one local address, connection
+counts are those of a single pool.
+
+    PYTHONPATH=. python benchmarks/loadtest.py --concurrency 1,10,50,200 \\
+        --mix get_title=60,search=20,endpoints=20 --cache-ttl 60
+
+Run it from the repository root, or drop `PYTHONPATH=.` once aioimdb is
+installed (e.g. with `pip install -e .`).
+"""
+import argparse
+import asyncio
+import bisect
+import itertools
+import multiprocessing
+import os
+import random
+import resource
+import socket
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+
+import aiohttp
+from aiohttp import web
+from yarl import URL
+
+from aioimdb import Imdb, LoopLagMonitor, ResiliencePolicy
+from aioimdb.client import ENDPOINTS
+
+# upper bounds in milliseconds of the latency histogram buckets
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, float('inf'))
+
+
+def _make_app(latency, payload, redirect_ratio):
+    padding = 'x' * payload
+
+    # without a content length the server closes HEAD connections, which
+    # real hosts do not do
+    empty = {'Content-Length': '0'}
+
+    async def delay():
+        if latency:
+            await asyncio.sleep(random.expovariate(1 / latency))
+
+    async def credentials(request):
+        expires = datetime.now(timezone.utc) + timedelta(hours=1)
+        return web.json_response({'resource': {
+            'accessKeyId': 'key', 'secretAccessKey': 'secret',
+            'sessionToken': 'token',
+            'expirationTimeStamp': expires.isoformat(),
+        }})
+
+    async def api(request):
+        await delay()
+        imdb_id = request.match_info['imdb_id']
+        return web.json_response({'resource': {
+            'base': {'id': f'/title/{imdb_id}/', 'titleType': 'movie',
+                     'title': f'Title {imdb_id}'},
+            'padding': padding,
+        }})
+
+    async def suggests(request):
+        await delay()
+        query = request.match_info['query']
+        return web.json_response({'d': [
+            {'l': f'{query} {number}', 'id': f'tt{number:07d}', 'y': 1994,
+             'q': 'feature'}
+            for number in range(1, 9)
+        ]})
+
+    async def page(request):
+        await delay()
+        number = int(request.match_info['imdb_id'][2:])
+        if number % 100 < redirect_ratio * 100:
+            return web.Response(status=301,
+                                headers=dict(empty, Location='/'))
+        return web.Response(headers=empty)
+
+    async def index(request):
+        return web.Response(headers=empty)
+
+    app = web.Application()
+    app.router.add_post('/api.imdbws.com/authentication/credentials/'
+                        'temporary/ios82', credentials)
+    app.router.add_get('/api.imdbws.com/{kind}/{imdb_id}/{resource}', api)
+    app.router.add_get('/v2.sg.media-imdb.com/suggests/{first}/{query}',
+                       suggests)
+    app.router.add_route('HEAD', '/www.imdb.com/title/{imdb_id}/', page)
+    app.router.add_route('HEAD', '/{host}/', index)
+    return app
+
+
+def _serve(sock, latency, payload, redirect_ratio):
+    web.run_app(_make_app(latency, payload, redirect_ratio), sock=sock,
+                print=None, handle_signals=False)
+
+
+class RewritingSession(object):
+    """
+    Wrapper of a `ClientSession` sending every request to `base`, prefixing
+    the path with the host the request was meant for.
+    """
+
+    def __init__(self, base, **kwargs):
+        self.session = aiohttp.ClientSession(**kwargs)
+        self._base = str(base).rstrip('/')
+
+    def _rewrite(self, url):
+        url = URL(url)
+        local = f'{self._base}/{url.host}{url.raw_path}'
+        if url.raw_query_string:
+            local += f'?{url.raw_query_string}'
+        return URL(local, encoded=True)
+
+    def get(self, url, **kwargs):
+        return self.session.get(self._rewrite(url), **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.session.head(self._rewrite(url), **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.session.post(self._rewrite(url), **kwargs)
+
+    async def close(self):
+        await self.session.close()
+
+
+class Workload(object):
+    """
+    Infinite sequence of `(kind, coroutine function, argument)` operations
+    drawn from a traffic mix with Zipfian id popularity.
+    """
+
+    def __init__(self, mix, ids=10000, exponent=1.1, seed=0):
+        self.random = random.Random(seed)
+        self.kinds = list(mix)
+        self.kind_weights = list(itertools.accumulate(mix.values()))
+        self.id_weights = list(itertools.accumulate(
+            1 / rank ** exponent for rank in range(1, ids + 1)))
+        self.endpoints = sorted(ENDPOINTS)
+
+    def _rank(self):
+        return self.random.choices(
+            range(1, len(self.id_weights) + 1),
+            cum_weights=self.id_weights)[0]
+
+    def next(self, imdb):
+        kind = self.random.choices(self.kinds,
+                                   cum_weights=self.kind_weights)[0]
+        rank = self._rank()
+        if kind == 'get_title':
+            return kind, imdb.get_title, f'tt{rank:07d}'
+        if kind == 'search':
+            return kind, imdb.search_for_title, f'movie {rank}'
+        name = self.random.choice(self.endpoints)
+        prefix = 'nm' if name.startswith('get_name') else 'tt'
+        return kind, getattr(imdb, name), f'{prefix}{rank:07d}'
+
+
+def _rss():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # peak rather than current resident size, in KiB on linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _percentile(values, percent):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+async def _monitor_lag(lags, interval=0.01):
+    while True:
+        started = time.monotonic()
+        await asyncio.sleep(interval)
+        lags.append(time.monotonic() - started - interval)
+
+
+async def _run_level(args, base, workload, concurrency):
+    connections = Counter()
+    trace = aiohttp.TraceConfig()
+
+    async def created(session, context, params):
+        connections['created'] += 1
+
+    async def reused(session, context, params):
+        connections['reused'] += 1
+
+    trace.on_connection_create_end.append(created)
+    trace.on_connection_reuseconn.append(reused)
+
+    session = RewritingSession(
+        base, connector=aiohttp.TCPConnector(limit=args.connection_limit),
+        trace_configs=[trace])
+    monitor = LoopLagMonitor(interval=0.01, threshold=0.02)
+    imdb = Imdb(session=session, cache_ttl=args.cache_ttl,
+                resilience=ResiliencePolicy() if args.resilience else None,
+                monitor=monitor, offload_threshold=args.offload_threshold)
+    imdb._cachedir = args.cachedir
+
+    latencies = defaultdict(list)
+    errors = Counter()
+    lags = []
+    remaining = [args.requests]
+
+    async def worker():
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            kind, method, argument = workload.next(imdb)
+            started = time.monotonic()
+            try:
+                await method(argument)
+            except LookupError:
+                pass
+            except Exception as exc:
+                errors[type(exc).__name__] += 1
+            latencies[kind].append(time.monotonic() - started)
+
+    async with imdb:
+        if args.warmup:
+            await imdb.warmup()
+        rss = _rss()
+        sampler = asyncio.ensure_future(_monitor_lag(lags))
+        started = time.monotonic()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.monotonic() - started
+        sampler.cancel()
+        growth = _rss() - rss
+    return {
+        'concurrency': concurrency,
+        'throughput': args.requests / elapsed,
+        'latencies': latencies,
+        'errors': errors,
+        'connections': connections,
+        'rss_growth': growth,
+        'lags': lags,
+        'stalls': monitor.metrics()['stalls'],
+    }
+
+
+def _histogram(latencies):
+    counts = [0] * len(BUCKETS)
+    for latency in latencies:
+        counts[bisect.bisect_left(BUCKETS, latency * 1000)] += 1
+    return counts
+
+
+def _report(result, histogram):
+    every = [latency for values in result['latencies'].values()
+             for latency in values]
+    ms = [_percentile(every, percent) * 1000 for percent in (50, 90, 99)]
+    print(f'{result["concurrency"]:>6} {result["throughput"]:>9.0f} '
+          f'{ms[0]:>7.1f} {ms[1]:>7.1f} {ms[2]:>7.1f} '
+          f'{sum(result["errors"].values()):>7} '
+          f'{result["connections"]["created"]:>6} '
+          f'{result["connections"]["reused"]:>7} '
+          f'{result["rss_growth"] / 2 ** 20:>8.1f} '
+          f'{_percentile(result["lags"], 99) * 1000:>8.1f} '
+          f'{max(result["lags"], default=0) * 1000:>8.1f}')
+    if result['stalls']:
+        stalls = ', '.join(
+            f'{phase} {stall["count"]} ({stall["lag"] * 1000:.0f} ms)'
+            for phase, stall in sorted(result['stalls'].items()))
+        print(f'{"":>6} stalls: {stalls}')
+    if result['errors']:
+        print(f'{"":>6} errors: {dict(result["errors"])}')
+    if histogram:
+        for kind, values in sorted(result['latencies'].items()):
+            counts = ' '.join(f'{count:>5}' for count in _histogram(values))
+            print(f'{"":>6} {kind:<10} {counts}')
+
+
+def _parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        kind, _, weight = part.partition('=')
+        if kind not in ('get_title', 'search', 'endpoints'):
+            raise argparse.ArgumentTypeError(f'unknown operation {kind}')
+        mix[kind] = float(weight)
+    return mix
+
+
+async def main(args):
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(1024)
+    base = f'http://127.0.0.1:{sock.getsockname()[1]}'
+    server = multiprocessing.Process(
+        target=_serve, daemon=True,
+        args=(sock, args.server_latency / 1000, args.payload,
+              args.redirect_ratio))
+    server.start()
+    try:
+        print(f'{"conc":>6} {"req/s":>9} {"p50 ms":>7} {"p90 ms":>7} '
+              f'{"p99 ms":>7} {"errors":>7} {"conns":>6} {"reused":>7} '
+              f'{"rss MiB":>8} {"lag p99":>8} {"lag max":>8}')
+        if args.histogram:
+            bounds = ' '.join(f'{f"<{bound:g}":>5}' for bound in BUCKETS)
+            print(f'{"":>6} {"ms":<10} {bounds}')
+        for concurrency in args.concurrency:
+            workload = Workload(args.mix, args.ids, args.zipf, args.seed)
+            result = await _run_level(args, base, workload, concurrency)
+            _report(result, args.histogram)
+    finally:
+        server.terminate()
+        sock.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--concurrency', default=[1, 10, 50, 200],
+                        type=lambda value: [int(v) for v in value.split(',')])
+    parser.add_argument('--requests', type=int, default=2000,
+                        help='requests per concurrency level')
+    parser.add_argument('--mix', type=_parse_mix,
+                        default=_parse_mix('get_title=60,search=20,'
+                                           'endpoints=20'))
+    parser.add_argument('--ids', type=int, default=10000)
+    parser.add_argument('--zipf', type=float, default=1.1,
+                        help='exponent of the id popularity distribution')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--server-latency', type=float, default=20,
+                        help='mean server latency in milliseconds')
+    parser.add_argument('--payload', type=int, default=2000,
+                        help='padding bytes of resource responses')
+    parser.add_argument('--redirect-ratio', type=float, default=0.05)
+    parser.add_argument('--cache-ttl', type=float, default=None)
+    parser.add_argument('--connection-limit', type=int, default=100)
+    parser.add_argument('--resilience', action='store_true')
+    parser.add_argument('--offload-threshold', type=int, default=None)
+    parser.add_argument('--warmup', action='store_true')
+    parser.add_argument('--histogram', action='store_true')
+    arguments = parser.parse_args()
+    with tempfile.TemporaryDirectory() as cachedir:
+        # keep the stand-in credentials out of the real credentials cache
+        arguments.cachedir = cachedir
+        asyncio.run(main(arguments))
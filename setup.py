@@ -46,7 +46,7 @@ setup(
     long_description_content_type='text/markdown',
     url='https://github.com/fpierfed/aioimdb',
     install_requires=install_requires,
-    python_requires='>=3.6',
+    python_requires='>=3.7',
     classifiers=[
         'Development Status :: 5 - Production/Stable',
         'Intended Audience :: Developers',
@@ -54,7 +54,7 @@ setup(
         'License :: OSI Approved :: Apache Software License',
         'Framework :: AsyncIO',
         'Programming Language :: Python',
-        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.7',
         'Topic :: Internet :: WWW/HTTP',
     ],
 )
@@ -0,0 +1,50 @@
+import asyncio
+import json
+import threading
+
+from aioimdb import Imdb
+
+
+class StubImdb(Imdb):
+    """
+    Client answering API requests with canned JSON instead of the network.
+
+    Every request gets `resource`, or `resource(path)` if it is callable,
+    after `latency` seconds, and requests for a path containing one of
+    `missing` raise LookupError. Requests are signed only if `sign` is set.
+    The paths sent and the threads decoding the responses are recorded in
+    `sent` and `threads`.
+    """
+
+    def __init__(self, resource=None, missing=(), latency=0, sign=False,
+                 **kwargs):
+        super().__init__(**kwargs)
+        self.resource = {} if resource is None else resource
+        self.missing = missing
+        self.latency = latency
+        self.sign = sign
+        self.sent = []
+        self.threads = []
+
+    async def get_auth_headers(self, url_path):
+        if self.sign:
+            return await super().get_auth_headers(url_path)
+        return {}
+
+    async def is_redirection_title(self, imdb_id):
+        return False
+
+    async def _send(self, url, path, headers, params):
+        self.sent.append(path)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if any(imdb_id in path for imdb_id in self.missing):
+            raise LookupError(f'Resource {path} not found')
+        resource = self.resource
+        if callable(resource):
+            resource = resource(path)
+        return json.dumps({'resource': resource})
+
+    def _decode(self, data, query=None):
+        self.threads.append(threading.current_thread().name)
+        return super()._decode(data, query)
@@ -0,0 +1,179 @@
+import asyncio
+import os
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from aioimdb import Imdb, ImdbAPIError
+from aioimdb.assets import (CACHED, DOWNLOADED, DUPLICATE, FAILED, Asset,
+                            AssetPipeline)
+
+
+class FakeImdb(Imdb):
+
+    def __init__(self, base_url):
+        super().__init__()
+        self.base_url = base_url
+
+    async def get_title_images(self, imdb_id):
+        return {'images': [
+            {'id': 'rm1', 'url': f'{self.base_url}/poster.jpg'},
+            {'id': 'rm2', 'url': f'{self.base_url}/poster-copy.jpg'},
+            {'id': 'rm3', 'url': f'{self.base_url}/missing.jpg'},
+        ]}
+
+    async def get_title_videos(self, imdb_id):
+        return {'videos': [{'id': 'vi1', 'encodings': [
+            {'definition': '480p', 'play': f'{self.base_url}/trailer.mp4'},
+            {'definition': '1080p', 'play': f'{self.base_url}/hd.mp4'},
+        ]}]}
+
+
+@pytest_asyncio.fixture
+async def server(tmpdir):
+    files = tmpdir.mkdir('server')
+    files.join('poster.jpg').write_binary(b'poster' * 1000)
+    files.join('poster-copy.jpg').write_binary(b'poster' * 1000)
+    files.join('trailer.mp4').write_binary(b'trailer' * 10000)
+
+    async def serve(request):
+        path = files.join(request.match_info['name'])
+        if not path.exists():
+            raise web.HTTPNotFound()
+        return web.FileResponse(str(path))
+
+    app = web.Application()
+    app.router.add_get('/{name}', serve)
+    async with TestServer(app) as server:
+        yield server
+
+
+@pytest.mark.asyncio
+async def test_run_downloads_and_deduplicates(server, tmpdir):
+    directory = str(tmpdir.join('assets'))
+    async with FakeImdb(str(server.make_url(''))) as imdb:
+        pipeline = AssetPipeline(imdb, directory, concurrency=2,
+                                 chunk_size=1024,
+                                 renditions={'original', '480p'})
+        results = [result async for result in pipeline.run(['tt0111161'])]
+
+        statuses = sorted(result.status for result in results)
+        assert statuses == sorted([DOWNLOADED, DOWNLOADED, DUPLICATE, FAILED])
+        stored = {result.path for result in results if result.path}
+        assert len(stored) == 2
+        trailer = [result for result in results
+                   if result.asset.rendition == '480p'][0]
+        with open(os.path.join(directory, trailer.path), 'rb') as f:
+            assert f.read() == b'trailer' * 10000
+
+        again = AssetPipeline(imdb, directory, renditions={'original'})
+        results = [result async for result in again.run(['tt0111161'])]
+        assert sorted(result.status for result in results) == \
+            [CACHED, CACHED, FAILED]
+
+
+@pytest.mark.asyncio
+async def test_partial_download_is_resumed(server, tmpdir):
+    directory = str(tmpdir.join('assets'))
+    url = str(server.make_url('/trailer.mp4'))
+    async with FakeImdb(str(server.make_url(''))) as imdb:
+        pipeline = AssetPipeline(imdb, directory)
+        os.makedirs(directory)
+        with open(pipeline._partial_path(url), 'wb') as f:
+            f.write(b'trailer' * 100)
+
+        asset = Asset('tt0111161', 'video', 'vi1', url, '480p', {})
+        results = [result async for result in pipeline.download([asset])]
+
+    assert results[0].status == DOWNLOADED
+    assert results[0].size == len(b'trailer' * 10000)
+    with open(os.path.join(directory, results[0].path), 'rb') as f:
+        assert f.read() == b'trailer' * 10000
+
+
+@pytest.mark.asyncio
+async def test_complete_partial_download_is_finalized(server, tmpdir):
+    directory = str(tmpdir.join('assets'))
+    url = str(server.make_url('/trailer.mp4'))
+    async with FakeImdb(str(server.make_url(''))) as imdb:
+        pipeline = AssetPipeline(imdb, directory)
+        os.makedirs(directory)
+        with open(pipeline._partial_path(url), 'wb') as f:
+            f.write(b'trailer' * 10000)
+
+        asset = Asset('tt0111161', 'video', 'vi1', url, '480p', {})
+        results = [result async for result in pipeline.download([asset])]
+
+    assert results[0].status == DOWNLOADED
+    assert not os.path.exists(pipeline._partial_path(url))
+    with open(os.path.join(directory, results[0].path), 'rb') as f:
+        assert f.read() == b'trailer' * 10000
+
+
+class FailingImdb(FakeImdb):
+
+    async def get_title_images(self, imdb_id):
+        if imdb_id == 'tt0000001':
+            raise ImdbAPIError('503 Service Unavailable')
+        return await super().get_title_images(imdb_id)
+
+
+@pytest.mark.asyncio
+async def test_listing_errors_are_reported_per_id(server, tmpdir):
+    directory = str(tmpdir.join('assets'))
+    async with FailingImdb(str(server.make_url(''))) as imdb:
+        pipeline = AssetPipeline(imdb, directory, renditions={'480p'})
+        results = [result async for result in
+                   pipeline.run(['tt0000001', 'tt0111161'])]
+
+    failed = [result for result in results if result.asset.url is None]
+    assert [(result.asset.imdb_id, result.asset.kind, result.status)
+            for result in failed] == [('tt0000001', 'image', FAILED)]
+    assert isinstance(failed[0].error, ImdbAPIError)
+    assert sorted((result.asset.imdb_id, result.status)
+                  for result in results if result.asset.url) == [
+        ('tt0000001', DOWNLOADED), ('tt0111161', DUPLICATE)]
+
+
+class BrokenPipeline(AssetPipeline):
+
+    async def _fetch(self, asset):
+        raise RuntimeError('unexpected')
+
+
+@pytest.mark.asyncio
+async def test_unexpected_download_errors_fail_the_asset(tmpdir):
+    assets = [Asset('tt0111161', 'image', f'rm{number}',
+                    f'http://localhost/{number}.jpg', 'original', {})
+              for number in range(10)]
+    async with FakeImdb('http://localhost') as imdb:
+        pipeline = BrokenPipeline(imdb, str(tmpdir.join('assets')),
+                                  concurrency=2)
+
+        results = await asyncio.wait_for(
+            _collect(pipeline.download(assets)), 5)
+
+    assert [result.status for result in results] == [FAILED] * 10
+    assert isinstance(results[0].error, RuntimeError)
+
+
+@pytest.mark.asyncio
+async def test_listing_failure_stops_the_download(tmpdir):
+    async def assets():
+        for number in range(10):
+            yield Asset('tt0111161', 'image', f'rm{number}',
+                        f'http://localhost/{number}.jpg', 'original', {})
+        raise ValueError('listing failed')
+
+    async with FakeImdb('http://localhost') as imdb:
+        pipeline = BrokenPipeline(imdb, str(tmpdir.join('assets')),
+                                  concurrency=1)
+
+        with pytest.raises(ValueError):
+            await asyncio.wait_for(_collect(pipeline.download(assets())), 5)
+
+
+async def _collect(results):
+    return [result async for result in results]
@@ -1,6 +1,9 @@
+import asyncio
+
 import pytest
 from freezegun import freeze_time
 
+from aioimdb import Imdb, auth as auth_module
 from aioimdb.auth import Auth
 
 
@@ -24,3 +27,65 @@ def auth():
 def test_creds_soon_expiring(auth, current_datetime, exp_expired):
     with freeze_time(current_datetime):
         assert auth._creds_soon_expiring()[1] is exp_expired
+
+
+@pytest.mark.asyncio
+async def test_credentials_are_read_from_disk_once(tmp_path, monkeypatch):
+    opened = []
+    open_cache = auth_module._open_cache
+
+    def counting_open_cache(directory):
+        opened.append(directory)
+        return open_cache(directory)
+
+    monkeypatch.setattr(auth_module, '_open_cache', counting_open_cache)
+    auth_ = Auth()
+    auth_._cachedir = str(tmp_path)
+    auth_._set_creds({
+        'accessKeyId': 'key', 'secretAccessKey': 'secret',
+        'sessionToken': 'token', 'expirationTimeStamp': '2018-01-12T06:23:05Z',
+    })
+    reader = Auth()
+    reader._cachedir = str(tmp_path)
+
+    with freeze_time('2018-01-11T06:23:05Z'):
+        for _ in range(3):
+            headers = await reader.get_auth_headers('/title/tt0111161/plot')
+            assert 'X-Amzn-Authorization' in headers
+
+    assert len(opened) == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_requests_share_one_refresh(tmp_path,
+                                                           monkeypatch):
+    opened = []
+    fetched = []
+    open_cache = auth_module._open_cache
+
+    def counting_open_cache(directory):
+        opened.append(directory)
+        return open_cache(directory)
+
+    async def get_credentials(session=None):
+        fetched.append(session)
+        # the loop clock is frozen, so only yield to other requests
+        await asyncio.sleep(0)
+        return {'accessKeyId': 'key', 'secretAccessKey': 'secret',
+                'sessionToken': 'token',
+                'expirationTimeStamp': '2018-01-12T06:23:05Z'}
+
+    monkeypatch.setattr(auth_module, '_open_cache', counting_open_cache)
+    monkeypatch.setattr(auth_module, '_get_credentials', get_credentials)
+    async with Imdb() as imdb:
+        imdb._cachedir = str(tmp_path)
+        with freeze_time('2018-01-11T06:23:05Z'):
+            headers = await asyncio.gather(*[
+                imdb.get_auth_headers(f'/title/tt000000{number}/plot')
+                for number in range(10)
+            ])
+
+    assert all('X-Amzn-Authorization' in header for header in headers)
+    assert len(fetched) == 1
+    # one read of the empty cache and one write of the new credentials
+    assert len(opened) == 2
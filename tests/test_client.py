@@ -0,0 +1,237 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from aioimdb import Imdb, auth
+
+from .conftest import StubImdb
+
+
+class FakeImdb(Imdb):
+    """
+    Client answering requests from canned data instead of the network.
+    """
+
+    def __init__(self, responses=None, **kwargs):
+        super().__init__(**kwargs)
+        self.responses = responses or {}
+        self.requests = []
+        self.redirection_checks = []
+
+    async def get_auth_headers(self, url_path):
+        return {'X-Signed-Path': url_path}
+
+    async def is_redirection_title(self, imdb_id):
+        self.redirection_checks.append(imdb_id)
+        return False
+
+    async def _get(self, url, query=None, params=None, locale=None,
+                   auth_headers=None):
+        locale = locale or self.locale
+        self.requests.append((url, locale))
+        key = (url, locale)
+        if key not in self.responses:
+            raise LookupError(f'Resource {url} not found')
+        return {'resource': self.responses[key]}
+
+
+TITLE_URL = 'https://api.imdbws.com/title/tt0111161/auxiliary'
+
+
+@pytest.mark.asyncio
+async def test_locale_override():
+    imdb = FakeImdb(responses={
+        ('https://api.imdbws.com/title/tt0111161/plot', 'fr_FR'): {'a': 1},
+        (TITLE_URL, 'de_DE'): {'base': {'titleType': 'movie'}},
+    })
+
+    assert await imdb.get_title_plot('tt0111161', locale='fr_FR') == \
+        {'a': 1}
+    assert (await imdb.get_title('tt0111161', locale='de_DE'))['base']
+    with pytest.raises(LookupError):
+        await imdb.get_title_plot('tt0111161')
+
+
+@pytest.mark.asyncio
+async def test_get_title_localized():
+    base = {'id': '/title/tt0111161/', 'titleType': 'movie', 'year': 1994}
+    imdb = FakeImdb(responses={
+        (TITLE_URL, 'en_US'): {
+            'base': dict(base, title='The Shawshank Redemption'),
+            'ratings': {'rating': 9.3},
+            'plot': {'outline': {'text': 'Two imprisoned men'}},
+        },
+        (TITLE_URL, 'fr_FR'): {
+            'base': dict(base, title='Les Evades'),
+            'ratings': {'rating': 9.3},
+            'plot': {'outline': {'text': 'Deux hommes'}},
+            'soundtrack': [],
+        },
+    })
+
+    result = await imdb.get_title_localized(
+        'tt0111161', locales=['en_US', 'fr_FR', 'en_US'])
+
+    assert imdb.redirection_checks == ['tt0111161']
+    assert result['common'] == {'base': base, 'ratings': {'rating': 9.3}}
+    assert result['locales'] == {
+        'en_US': {
+            'base': {'title': 'The Shawshank Redemption'},
+            'plot': {'outline': {'text': 'Two imprisoned men'}},
+        },
+        'fr_FR': {
+            'base': {'title': 'Les Evades'},
+            'plot': {'outline': {'text': 'Deux hommes'}},
+            'soundtrack': [],
+        },
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_title_localized_not_found():
+    with pytest.raises(LookupError):
+        await FakeImdb().get_title_localized('tt0111161', ['en_US'])
+
+
+def test_session_can_be_replaced():
+    imdb = Imdb()
+    session = object()
+    imdb.session = session
+    assert imdb.session is session
+
+
+@pytest.mark.parametrize('url, name', [
+    ('https://api.imdbws.com/title/tt0111161/fullcredits',
+     'get_title_credits'),
+    ('https://api.imdbws.com/title/tt0111161/auxiliary', 'get_title'),
+    ('https://v2.sg.media-imdb.com/suggests/s/shawshank.json', 'search'),
+    ('https://api.imdbws.com/chart/tvmeter', '/chart/tvmeter'),
+])
+def test_endpoint_name(url, name):
+    assert Imdb._endpoint_name(url) == name
+
+
+def _name_responses():
+    api = 'https://api.imdbws.com'
+    responses = {}
+    filmographies = {
+        'nm0000151': ['tt0111161', 'tt0068646'],
+        'nm0000209': ['tt0111161', 'tt0097165'],
+        'nm0000288': ['tt0468569', 'tt123456789012345'],
+    }
+    for name_id, title_ids in filmographies.items():
+        responses[(f'{api}/name/{name_id}/fulldetails', 'en_US')] = \
+            {'id': f'/name/{name_id}/'}
+        responses[(f'{api}/name/{name_id}/filmography', 'en_US')] = {
+            'filmography': [{'id': f'/title/{title_id}/'}
+                            for title_id in title_ids],
+        }
+    for title_id in ['tt0111161', 'tt0068646']:
+        responses[(f'{api}/title/{title_id}/auxiliary', 'en_US')] = \
+            {'base': {'id': f'/title/{title_id}/', 'titleType': 'movie'}}
+    return responses
+
+
+@pytest.mark.asyncio
+async def test_get_names_with_filmography():
+    imdb = FakeImdb(responses=_name_responses())
+
+    results = await imdb.get_names_with_filmography(
+        ['nm0000151', 'nm0000209', 'nm9999999'], concurrency=2)
+
+    assert results['nm9999999'] is None
+    freeman, williams = results['nm0000151'], results['nm0000209']
+    assert list(freeman['titles']) == ['tt0111161', 'tt0068646']
+    assert list(williams['titles']) == ['tt0111161', 'tt0097165']
+    assert williams['titles']['tt0097165'] is None
+    assert freeman['titles']['tt0111161'] is williams['titles']['tt0111161']
+    title_requests = [url for url, _ in imdb.requests if '/title/' in url]
+    assert len(title_requests) == 3
+    assert len(set(title_requests)) == 3
+
+
+@pytest.mark.asyncio
+async def test_get_names_with_filmography_without_hydration():
+    imdb = FakeImdb(responses=_name_responses())
+
+    results = await imdb.get_names_with_filmography(['nm0000151'],
+                                                    hydrate=None)
+
+    assert results['nm0000151']['titles'] == {
+        'tt0111161': None, 'tt0068646': None,
+    }
+    assert not [url for url, _ in imdb.requests if '/title/' in url]
+
+
+@pytest.mark.asyncio
+async def test_get_names_with_filmography_keeps_long_title_ids():
+    imdb = FakeImdb(responses=_name_responses())
+
+    results = await imdb.get_names_with_filmography(['nm0000288'])
+
+    assert list(results['nm0000288']['titles']) == [
+        'tt0468569', 'tt123456789012345',
+    ]
+
+
+def _warmup_imdb(**kwargs):
+    return StubImdb(resource={'base': {'titleType': 'movie'}},
+                    missing=['tt0000000'], sign=True, **kwargs)
+
+
+@pytest_asyncio.fixture
+async def head_server():
+    heads = []
+
+    async def index(request):
+        heads.append(request.path)
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_route('HEAD', '/', index)
+    async with TestServer(app) as server:
+        server.heads = heads
+        yield server
+
+
+@pytest.mark.asyncio
+async def test_warmup(head_server, tmp_path, monkeypatch):
+    sessions = []
+
+    async def get_credentials(session=None):
+        sessions.append(session)
+        expires = datetime.now(timezone.utc) + timedelta(hours=1)
+        return {'accessKeyId': 'key', 'secretAccessKey': 'secret',
+                'sessionToken': 'token',
+                'expirationTimeStamp': expires.isoformat()}
+
+    monkeypatch.setattr(auth, '_get_credentials', get_credentials)
+    async with _warmup_imdb(cache_ttl=60) as imdb:
+        imdb._cachedir = str(tmp_path)
+        host = str(head_server.make_url('')).rstrip('/')
+
+        timings = await imdb.warmup(prefetch=['tt0111161', 'tt0000000'],
+                                    hosts=[host], connections=2)
+
+        assert set(timings) == {'credentials', 'connections', 'prefetch',
+                                'total'}
+        assert sessions == [imdb.session]
+        assert head_server.heads == ['/', '/']
+        assert len(imdb.sent) == 2
+
+        assert await imdb.get_title('tt0111161')
+        assert len(imdb.sent) == 2
+
+        imdb.response_cache.clear()
+        await imdb.get_title('tt0111161')
+        assert len(imdb.sent) == 3
+
+
+@pytest.mark.asyncio
+async def test_warmup_prefetch_requires_cache():
+    async with _warmup_imdb() as imdb:
+        with pytest.raises(ValueError):
+            await imdb.warmup(prefetch=['tt0111161'])
@@ -0,0 +1,148 @@
+import json
+
+import aiohttp
+import pytest
+
+from aioimdb import Crawler, Imdb
+from aioimdb.crawler import IdBitset
+from aioimdb.ids import decode_imdb_id
+
+
+GRAPH = {
+    'tt0000001': ['tt0000002', 'tt0000003'],
+    'tt0000002': ['tt0000001', 'tt0000004'],
+    'tt0000003': ['tt0000004'],
+    'tt0000004': [],
+}
+
+
+class FakeImdb(Imdb):
+
+    def __init__(self):
+        self.calls = []
+
+    async def get_title_similarities(self, imdb_id):
+        self.calls.append(imdb_id)
+        return {
+            'base': {'id': f'/title/{imdb_id}/'},
+            'similarities': [
+                {'id': f'/title/{target}/'} for target in GRAPH[imdb_id]
+            ],
+        }
+
+    async def get_title_connections(self, imdb_id):
+        raise LookupError('no connections')
+
+
+def test_id_bitset_round_trip():
+    bitset = IdBitset()
+    assert bitset.add('tt0111161') is True
+    assert bitset.add('tt0111161') is False
+    assert bitset.add('nm0000151') is True
+    assert 'tt0111161' in bitset
+    assert 'tt0111162' not in bitset
+    assert 'nm9999999' not in bitset
+
+    restored = IdBitset.from_dict(bitset.to_dict())
+    assert len(restored) == 2
+    assert 'nm0000151' in restored
+
+
+def test_id_bitset_tells_widths_apart():
+    bitset = IdBitset()
+    bitset.add('tt0111161')
+    assert 'tt00111161' not in bitset
+    assert bitset.add('tt00111161') is True
+
+    restored = IdBitset.from_dict(bitset.to_dict())
+    assert len(restored) == 2
+    assert 'tt00111161' in restored
+    assert 'tt000111161' not in restored
+
+
+def test_id_bitset_keeps_long_ids_apart():
+    bitset = IdBitset()
+    assert bitset.add('tt1234567890') is True
+    assert bitset.add('tt1234567890123456') is True
+    assert bitset.add('tt1234567890') is False
+    assert not bitset._bits
+
+    restored = IdBitset.from_dict(bitset.to_dict())
+    assert len(restored) == 2
+    assert 'tt1234567890123456' in restored
+
+
+@pytest.mark.asyncio
+async def test_crawl_visits_every_node_once():
+    imdb = FakeImdb()
+    crawler = Crawler(imdb, concurrency=2)
+
+    edges = [edge async for edge in crawler.crawl(['tt0000001'])]
+
+    assert sorted(imdb.calls) == sorted(GRAPH)
+    assert len(edges) == 5
+    assert {edge.kind for edge in edges} == {'similarities'}
+    assert crawler.failed == 4
+
+
+@pytest.mark.asyncio
+async def test_crawl_max_depth():
+    imdb = FakeImdb()
+    crawler = Crawler(imdb, max_depth=1)
+
+    [edge async for edge in crawler.crawl(['tt0000001'])]
+
+    assert sorted(imdb.calls) == ['tt0000001', 'tt0000002', 'tt0000003']
+
+
+@pytest.mark.asyncio
+async def test_crawl_resumes_from_checkpoint(tmpdir):
+    checkpoint = str(tmpdir.join('crawl.json'))
+    crawler = Crawler(FakeImdb(), concurrency=1, checkpoint=checkpoint)
+    edges = crawler.crawl(['tt0000001'])
+    first = await edges.__anext__()
+    await edges.aclose()
+    with open(checkpoint) as f:
+        frontier = json.load(f)['frontier']
+    assert sorted(decode_imdb_id(key) for key, _ in frontier) == [
+        'tt0000001', 'tt0000002', 'tt0000003']
+
+    imdb = FakeImdb()
+    resumed = Crawler(imdb, concurrency=1, checkpoint=checkpoint)
+    rest = [edge async for edge in resumed.crawl(['tt0000001'])]
+
+    # tt0000001 was interrupted before all of its edges were yielded
+    assert sorted(imdb.calls) == sorted(GRAPH)
+    assert {first, *rest} == {
+        (source, target, 'similarities')
+        for source, targets in GRAPH.items() for target in targets
+    }
+
+
+class UnreliableImdb(FakeImdb):
+
+    async def get_title_similarities(self, imdb_id):
+        if imdb_id == 'tt0000002':
+            raise aiohttp.ClientConnectionError('connection reset')
+        resource = await super().get_title_similarities(imdb_id)
+        if imdb_id == 'tt0000001':
+            resource['similarities'].append(
+                {'id': '/title/tt1234567890123456/'})
+        return resource
+
+
+@pytest.mark.asyncio
+async def test_crawl_survives_transport_errors_and_long_ids():
+    imdb = UnreliableImdb()
+    GRAPH['tt1234567890123456'] = []
+    try:
+        crawler = Crawler(imdb, concurrency=1)
+        edges = [edge async for edge in crawler.crawl(['tt0000001'])]
+    finally:
+        del GRAPH['tt1234567890123456']
+
+    assert {edge.target for edge in edges} == {
+        'tt0000002', 'tt0000003', 'tt0000004', 'tt1234567890123456'}
+    assert 'tt1234567890123456' in imdb.calls
+    # the connections of the five nodes and the reset similarities
+    assert crawler.failed == 6
@@ -0,0 +1,82 @@
+import json
+import os
+
+from aioimdb.export import MANIFEST_NAME, export
+
+from .conftest import StubImdb
+
+
+def _title(path):
+    return {'id': path.split('/')[2], 'pid': os.getpid()}
+
+
+CLIENT = {'client_class': StubImdb,
+          'imdb_kwargs': {'resource': _title, 'missing': ['tt9999999']}}
+
+
+def _read_shards(output_dir):
+    records = {}
+    for filename in os.listdir(output_dir):
+        if filename.endswith('.jsonl'):
+            with open(os.path.join(output_dir, filename)) as f:
+                for line in f:
+                    record = json.loads(line)
+                    records[record['imdb_id']] = record['data']
+    return records
+
+
+def test_export(tmpdir):
+    output_dir = str(tmpdir)
+    imdb_ids = [f'tt{number:07d}' for number in range(1, 41)]
+    imdb_ids.append('tt9999999')
+
+    manifest = export(imdb_ids, output_dir, processes=2, shards=4,
+                      **CLIENT)
+
+    assert len(manifest['shards']) == 4
+    assert all(shard['complete'] for shard in manifest['shards'].values())
+    records = _read_shards(output_dir)
+    assert sorted(records) == sorted(imdb_ids)
+    assert records['tt9999999'] is None
+    assert records['tt0000001']['id'] == 'tt0000001'
+    assert len({data['pid'] for data in records.values() if data}) <= 2
+
+
+def test_export_resumes(tmpdir):
+    output_dir = str(tmpdir)
+    imdb_ids = [f'tt{number:07d}' for number in range(1, 11)]
+    export(imdb_ids, output_dir, processes=1, shards=2,
+           **CLIENT)
+
+    # simulate an interrupted run: drop one record and reopen the shard
+    shard_path = os.path.join(output_dir, 'shard-00000.jsonl')
+    with open(shard_path) as f:
+        lines = f.readlines()
+    with open(shard_path, 'w') as f:
+        f.writelines(lines[1:])
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    manifest['shards']['shard-00000']['complete'] = False
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f)
+
+    manifest = export([], output_dir, processes=1, **CLIENT)
+
+    assert manifest['shards']['shard-00000']['complete']
+    with open(shard_path) as f:
+        assert len(f.readlines()) == len(lines)
+    assert sorted(_read_shards(output_dir)) == imdb_ids
+
+
+def test_export_deduplicates_ids(tmpdir):
+    output_dir = str(tmpdir)
+    imdb_ids = ['tt0000001', 'tt0000001', 'tt0000002']
+
+    manifest = export(imdb_ids, output_dir, processes=1, shards=1,
+                      **CLIENT)
+
+    shard = manifest['shards']['shard-00000']
+    assert shard == {'total': 2, 'done': 2, 'complete': True}
+    with open(os.path.join(output_dir, 'shard-00000.jsonl')) as f:
+        assert len(f.readlines()) == 2
@@ -0,0 +1,71 @@
+from array import array
+
+import pytest
+
+from aioimdb.ids import (compact_imdb_id, decode_imdb_id, decode_imdb_ids,
+                         encode_imdb_id, encode_imdb_ids, expand_imdb_id,
+                         extract_imdb_ids, split_imdb_id)
+
+
+@pytest.mark.parametrize('imdb_id', [
+    'tt0111161', 'nm0000151', 'co0071326', 'ch0000001', 'tt10872600',
+    'nm0000000',
+])
+def test_round_trip(imdb_id):
+    assert decode_imdb_id(encode_imdb_id(imdb_id)) == imdb_id
+
+
+def test_codes_are_distinct_per_prefix_and_padding():
+    codes = {encode_imdb_id(imdb_id) for imdb_id in [
+        'tt0111161', 'nm0111161', 'tt00111161', 'tt0111162',
+    ]}
+    assert len(codes) == 4
+    assert all(0 <= code < 2 ** 64 for code in codes)
+
+
+def test_encode_normalizes_prefix_case():
+    assert encode_imdb_id('TT0111161') == encode_imdb_id('tt0111161')
+
+
+@pytest.mark.parametrize('imdb_id', [
+    'xx0111161', 'tt011116', 'tt0111161x', '', None, 111161,
+])
+def test_encode_invalid(imdb_id):
+    with pytest.raises(ValueError):
+        encode_imdb_id(imdb_id)
+
+
+def test_decode_invalid():
+    with pytest.raises(ValueError):
+        decode_imdb_id(111161)
+
+
+def test_split_imdb_id():
+    assert split_imdb_id('nm0000151') == (2, 151)
+
+
+@pytest.mark.parametrize('imdb_id', ['tt0111161', 'tt123456789012345'])
+def test_compact_round_trip(imdb_id):
+    assert expand_imdb_id(compact_imdb_id(imdb_id)) == imdb_id
+
+
+def test_compact_encodes_when_possible():
+    assert compact_imdb_id('tt0111161') == encode_imdb_id('tt0111161')
+
+
+def test_vectorized():
+    imdb_ids = ['tt0111161', 'nm0000151', 'tt10872600']
+    codes = encode_imdb_ids(imdb_ids)
+    assert isinstance(codes, array)
+    assert codes.typecode == 'Q'
+    assert decode_imdb_ids(codes) == imdb_ids
+
+
+def test_extract_imdb_ids():
+    data = {
+        'id': '/title/tt0111161/',
+        'credits': [{'id': '/name/nm0000151/'}, {'id': '/title/tt0111161/'}],
+        'char': '/character/ch0000001/',
+    }
+    assert extract_imdb_ids(data) == ['tt0111161', 'nm0000151']
+    assert extract_imdb_ids(data, prefixes=('nm', )) == ['nm0000151']
@@ -0,0 +1,43 @@
+import subprocess
+import sys
+
+IMPORT_TIME_BUDGET_US = 200000
+HEAVY_MODULES = ['aiohttp', 'boto', 'dateutil', 'diskcache']
+
+
+def _run(code, *options):
+    return subprocess.run(
+        [sys.executable, *options, '-c', code],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, check=True,
+    )
+
+
+def test_import_time_budget():
+    stderr = _run('import aioimdb', '-X', 'importtime').stderr
+    cumulative = {}
+    for line in stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, total, name = line.split('|')
+            if total.strip().isdigit():
+                cumulative[name.strip()] = int(total)
+
+    assert cumulative['aioimdb'] < IMPORT_TIME_BUDGET_US
+    for module in HEAVY_MODULES:
+        assert module not in cumulative
+
+
+def test_heavy_dependencies_load_lazily():
+    code = (
+        'import asyncio, sys, aioimdb\n'
+        'imdb = aioimdb.Imdb()\n'
+        'print(",".join(sorted(m for m in {!r} if m in sys.modules)))\n'
+        'async def main():\n'
+        '    async with imdb:\n'
+        '        imdb.session\n'
+        'asyncio.run(main())\n'
+        'print("aiohttp" in sys.modules)\n'
+    ).format(HEAVY_MODULES)
+    lines = _run(code).stdout.splitlines()
+
+    assert lines == ['', 'True']
@@ -0,0 +1,167 @@
+import json
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from aioimdb import ImdbAPIError, jsonstream
+from aioimdb.jsonstream import WILDCARD, JsonItemStream
+
+from .conftest import StubImdb
+
+DOCUMENT = {
+    'resource': {
+        '@type': 'imdb.api.title.fullcredits',
+        'credits': {
+            'cast': [
+                {'name': 'Tim "Andy" Robbins', 'roles': ['Andy \\ Dufresne']},
+                {'name': 'Morgan Freeman', 'meta': {'brackets': '}]{['}},
+            ],
+            'director': [{'name': 'Frank Darabont'}],
+        },
+        'releases': ['skipped', {'region': 'US', 'date': '1994-10-14'}],
+        'other': [{'ignored': True}],
+    },
+}
+EXPECTED = [
+    (('resource', 'credits', 'cast'),
+     DOCUMENT['resource']['credits']['cast'][0]),
+    (('resource', 'credits', 'cast'),
+     DOCUMENT['resource']['credits']['cast'][1]),
+    (('resource', 'credits', 'director'),
+     DOCUMENT['resource']['credits']['director'][0]),
+    (('resource', 'releases'), DOCUMENT['resource']['releases'][1]),
+]
+PATTERNS = [('resource', 'credits', WILDCARD), ('resource', 'releases')]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 64, 100000])
+def test_items_across_chunk_boundaries(chunk_size):
+    data = json.dumps(DOCUMENT, ensure_ascii=False).encode('utf-8')
+    stream = JsonItemStream(PATTERNS)
+
+    items = []
+    for start in range(0, len(data), chunk_size):
+        items.extend(stream.feed(data[start:start + chunk_size]))
+
+    assert items == EXPECTED
+
+
+def test_buffer_is_bounded_by_item_size():
+    cast = [{'name': f'actor {number}'} for number in range(10000)]
+    data = json.dumps({'resource': {'credits': {'cast': cast}}}).encode()
+    stream = JsonItemStream(PATTERNS)
+
+    largest_buffer = 0
+    count = 0
+    for start in range(0, len(data), 256):
+        count += len(stream.feed(data[start:start + 256]))
+        largest_buffer = max(largest_buffer, len(stream._buffer))
+
+    assert count == len(cast)
+    assert largest_buffer < 512
+
+
+@pytest.mark.parametrize('chunk_size', [1, 5, 100000])
+def test_malformed_item_raises(chunk_size):
+    data = b'{"resource": {"releases": [{"a": 1}, {"b": nope}, {"c": 3}]}}'
+    stream = JsonItemStream(PATTERNS)
+
+    with pytest.raises(ValueError):
+        for start in range(0, len(data), chunk_size):
+            stream.feed(data[start:start + chunk_size])
+
+
+@pytest.mark.parametrize('data', [
+    b'<html><body>Service Unavailable, retry later</body></html>',
+    b']',
+    b'{"a": 1}}',
+    b'{"resource": {"releases": [1, 2}}',
+])
+def test_malformed_document_raises(data):
+    stream = JsonItemStream(PATTERNS)
+
+    with pytest.raises(ValueError):
+        stream.feed(data)
+        stream.close()
+
+
+def test_truncated_document_raises_on_close():
+    stream = JsonItemStream(PATTERNS)
+    assert stream.feed(b'{"resource": {"releases": [{"a": 1}, {"b"') == [
+        (('resource', 'releases'), {'a': 1})]
+
+    with pytest.raises(ValueError):
+        stream.close()
+
+    complete = JsonItemStream(PATTERNS)
+    complete.feed(b'{"resource": {"releases": []}}\n')
+    complete.close()
+
+
+def test_large_item_is_decoded_once(monkeypatch):
+    attempts = []
+    decoder = jsonstream._DECODER
+
+    class CountingDecoder(object):
+        def raw_decode(self, text, pos):
+            attempts.append(pos)
+            return decoder.raw_decode(text, pos)
+
+    monkeypatch.setattr(jsonstream, '_DECODER', CountingDecoder())
+    item = {'text': 'x' * 2000000}
+    data = json.dumps({'resource': {'releases': [item]}}).encode()
+    stream = JsonItemStream(PATTERNS)
+
+    items = []
+    for start in range(0, len(data), 4096):
+        items.extend(stream.feed(data[start:start + 4096]))
+
+    assert items == [(('resource', 'releases'), item)]
+    assert len(attempts) <= 2
+
+
+@pytest_asyncio.fixture
+async def server():
+    async def fullcredits(request):
+        response = web.StreamResponse()
+        await response.prepare(request)
+        data = json.dumps(DOCUMENT).encode()
+        for start in range(0, len(data), 10):
+            await response.write(data[start:start + 10])
+        return response
+
+    async def truncated(request):
+        return web.Response(body=json.dumps(DOCUMENT).encode()[:-20])
+
+    async def html(request):
+        return web.Response(body=b'<html>Oops, an error</html>')
+
+    app = web.Application()
+    app.router.add_get('/title/tt0111161/fullcredits', fullcredits)
+    app.router.add_get('/title/tt0000001/fullcredits', truncated)
+    app.router.add_get('/title/tt0000002/fullcredits', html)
+    async with TestServer(app) as server:
+        yield server
+
+
+@pytest.mark.asyncio
+async def test_client_stream(server):
+    async with StubImdb() as imdb:
+        url = str(server.make_url('/title/tt0111161/fullcredits'))
+        stream = imdb._stream(url, PATTERNS, chunk_size=16)
+        items = [item async for item in stream]
+        assert items == EXPECTED
+
+        with pytest.raises(LookupError):
+            missing = str(server.make_url('/title/tt0000000/fullcredits'))
+            [item async for item in imdb._stream(missing, PATTERNS)]
+
+        with pytest.raises(ImdbAPIError):
+            truncated = str(server.make_url('/title/tt0000001/fullcredits'))
+            [item async for item in imdb._stream(truncated, PATTERNS)]
+
+        with pytest.raises(ImdbAPIError):
+            html = str(server.make_url('/title/tt0000002/fullcredits'))
+            [item async for item in imdb._stream(html, PATTERNS)]
@@ -0,0 +1,71 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from aioimdb import Imdb, LoopLagMonitor, auth
+from aioimdb.monitor import OTHER
+
+from .conftest import StubImdb
+
+
+@pytest.mark.asyncio
+async def test_stalls_are_attributed_to_phases():
+    monitor = LoopLagMonitor(interval=0.01, threshold=0.05)
+    monitor.start()
+    await asyncio.sleep(0.02)
+
+    with monitor.phase('decode'):
+        time.sleep(0.1)
+    await asyncio.sleep(0.02)
+    time.sleep(0.1)
+    await asyncio.sleep(0.02)
+    await monitor.stop()
+
+    metrics = monitor.metrics()
+    assert metrics['samples'] >= 3
+    assert metrics['max_lag'] >= 0.09
+    assert set(metrics['stalls']) == {'decode', OTHER}
+    assert metrics['stalls']['decode']['count'] == 1
+    assert [stall.phase for stall in monitor.stalls] == ['decode', OTHER]
+    assert not monitor.running
+
+
+@pytest.mark.asyncio
+async def test_large_responses_are_decoded_off_the_loop():
+    monitor = LoopLagMonitor()
+    async with StubImdb(resource=lambda path: {'path': path},
+                        offload_threshold=40, monitor=monitor) as imdb:
+        assert monitor.running
+        await imdb._get_resource('/title/tt0111161/plot')
+        await imdb._get_resource('/a')
+
+        assert imdb.threads[0].startswith('aioimdb')
+        assert imdb.threads[1] == threading.main_thread().name
+    assert not monitor.running
+    assert imdb._thread_pool is None
+
+
+@pytest.mark.asyncio
+async def test_decoding_in_a_process_pool(tmp_path, monkeypatch):
+    async def get_credentials(session=None):
+        expires = datetime.now(timezone.utc) + timedelta(hours=1)
+        return {'accessKeyId': 'key', 'secretAccessKey': 'secret',
+                'sessionToken': 'token',
+                'expirationTimeStamp': expires.isoformat()}
+
+    async def send(url, path, headers, params):
+        return json.dumps({'resource': {'path': path}})
+
+    monkeypatch.setattr(auth, '_get_credentials', get_credentials)
+    with ProcessPoolExecutor(1) as executor:
+        async with Imdb(executor=executor, offload_threshold=0) as imdb:
+            imdb._cachedir = str(tmp_path)
+            imdb._send = send
+            resource = await imdb._get_resource('/title/tt0111161/plot')
+
+    assert resource == {'path': '/title/tt0111161/plot'}
@@ -0,0 +1,150 @@
+import asyncio
+
+import pytest
+from freezegun import freeze_time
+
+from aioimdb import ImdbAPIError, ImdbCircuitOpenError, RequestScheduler
+from aioimdb.resilience import (CircuitBreaker, LatencyTracker,
+                                ResiliencePolicy)
+
+from .conftest import StubImdb
+
+
+def test_circuit_breaker_opens_and_recovers():
+    with freeze_time('2018-01-12T06:00:00Z') as frozen:
+        breaker = CircuitBreaker(min_requests=4, reset_timeout=10)
+        for ok in (True, False, True, True):
+            breaker.record(ok)
+        assert breaker.state == CircuitBreaker.CLOSED
+
+        for _ in range(2):
+            breaker.record(False)
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.allow() is False
+
+        frozen.tick(10)
+        assert breaker.allow() == CircuitBreaker.PROBE
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow() is False
+        breaker.record(False, probe=True)
+        assert breaker.state == CircuitBreaker.OPEN
+
+        frozen.tick(10)
+        assert breaker.allow() == CircuitBreaker.PROBE
+        breaker.record(True, probe=True)
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_only_resolved_by_probe():
+    with freeze_time('2018-01-12T06:00:00Z') as frozen:
+        breaker = CircuitBreaker(min_requests=2, reset_timeout=10)
+        breaker.record(False)
+        breaker.record(False)
+        frozen.tick(10)
+        assert breaker.allow() == CircuitBreaker.PROBE
+
+        # requests sent before the breaker opened complete meanwhile
+        breaker.record(True)
+        breaker.abandon()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow() is False
+
+        breaker.abandon(probe=True)
+        assert breaker.allow() == CircuitBreaker.PROBE
+        breaker.record(True, probe=True)
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_latency_tracker_percentile():
+    tracker = LatencyTracker(size=100, min_samples=10)
+    for value in range(5):
+        tracker.add(value)
+    assert tracker.percentile(95) is None
+    for value in range(5, 100):
+        tracker.add(value)
+    assert tracker.percentile(95) == 95
+    assert tracker.percentile(100) == 99
+
+
+def _policy(**kwargs):
+    return ResiliencePolicy(
+        breaker_options={'min_requests': 3, 'reset_timeout': 60}, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_serves_stale_response():
+    policy = _policy()
+    assert await policy.call('host', 'ep', 'key', _returns('fresh')) == \
+        'fresh'
+    for _ in range(2):
+        with pytest.raises(ImdbAPIError):
+            await policy.call('host', 'ep', 'key', _fails)
+
+    assert await policy.call('host', 'ep', 'key', _returns('new')) == 'fresh'
+    with pytest.raises(ImdbCircuitOpenError):
+        await policy.call('host', 'ep', 'other', _returns('new'))
+    assert await policy.call('other', 'ep', 'other', _returns('new')) == \
+        'new'
+
+
+@pytest.mark.asyncio
+async def test_not_found_does_not_trip_breaker():
+    policy = _policy()
+    for _ in range(3):
+        with pytest.raises(LookupError):
+            await policy.call('host', 'ep', 'key', _not_found)
+    assert policy.breaker('host').state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.asyncio
+async def test_endpoint_timeout():
+    policy = _policy(timeouts={'slow': 0.01})
+
+    with pytest.raises(ImdbAPIError, match='timed out'):
+        await policy.call('host', 'slow', 'key', _returns('x', delay=1))
+
+
+@pytest.mark.asyncio
+async def test_slow_request_is_hedged():
+    policy = _policy(hedge_ratio=1)
+    for _ in range(20):
+        policy.latency('ep').add(0.01)
+    delays = [1, 0]
+
+    async def send():
+        await asyncio.sleep(delays.pop(0))
+        return len(delays)
+
+    assert await policy.call('host', 'ep', 'key', send) == 0
+    assert policy.hedged == 1
+
+
+@pytest.mark.asyncio
+async def test_scheduler_queue_wait_is_not_timed():
+    policy = _policy(default_timeout=0.1)
+    policy.latency('get_title_plot').min_samples = 1
+    scheduler = RequestScheduler(max_concurrency=1)
+    async with StubImdb(latency=0.04, scheduler=scheduler,
+                        resilience=policy) as imdb:
+        await asyncio.gather(*[
+            imdb.get_title_plot(f'tt{number:07d}') for number in range(8)
+        ])
+
+    assert scheduler.dispatched == 8
+    assert policy.breaker('api.imdbws.com').state == CircuitBreaker.CLOSED
+    assert policy.latency('get_title_plot').percentile(100) < 0.1
+
+
+async def _fails():
+    raise ImdbAPIError('500')
+
+
+async def _not_found():
+    raise LookupError('Resource not found')
+
+
+def _returns(value, delay=0):
+    async def send():
+        await asyncio.sleep(delay)
+        return value
+    return send
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from aioimdb import ImdbDeadlineExceeded
+from aioimdb.scheduler import (PRIORITY_BULK, PRIORITY_INTERACTIVE,
+                               RequestScheduler, scheduling)
+
+
+async def _request(scheduler, order, name, hold=0.01):
+    async with scheduler.slot():
+        order.append(name)
+        await asyncio.sleep(hold)
+
+
+def _spawn(scheduler, order, name, **options):
+    with scheduling(**options):
+        return asyncio.ensure_future(_request(scheduler, order, name))
+
+
+@pytest.mark.asyncio
+async def test_interactive_requests_jump_the_queue():
+    scheduler = RequestScheduler(max_concurrency=1)
+    order = []
+    tasks = [_spawn(scheduler, order, f'bulk{i}', priority=PRIORITY_BULK)
+             for i in range(3)]
+    await asyncio.sleep(0)
+    tasks.append(_spawn(scheduler, order, 'interactive',
+                        priority=PRIORITY_INTERACTIVE))
+    await asyncio.gather(*tasks)
+
+    assert order == ['bulk0', 'interactive', 'bulk1', 'bulk2']
+
+
+@pytest.mark.asyncio
+async def test_round_robin_between_tenants():
+    scheduler = RequestScheduler(max_concurrency=1)
+    order = []
+    tasks = [_spawn(scheduler, order, 'a0', tenant='a')]
+    await asyncio.sleep(0)
+    tasks += [_spawn(scheduler, order, f'a{i}', tenant='a')
+              for i in range(1, 4)]
+    tasks += [_spawn(scheduler, order, f'b{i}', tenant='b')
+              for i in range(2)]
+    await asyncio.gather(*tasks)
+
+    assert order == ['a0', 'a1', 'b0', 'a2', 'b1', 'a3']
+
+
+@pytest.mark.asyncio
+async def test_reserved_interactive_slots():
+    scheduler = RequestScheduler(max_concurrency=2, reserved_interactive=1)
+    order = []
+    tasks = [_spawn(scheduler, order, f'bulk{i}', priority=PRIORITY_BULK)
+             for i in range(2)]
+    await asyncio.sleep(0)
+
+    assert scheduler.in_flight == 1
+    assert scheduler.metrics()['queued'][PRIORITY_BULK] == {'default': 1}
+
+    tasks.append(_spawn(scheduler, order, 'interactive',
+                        priority=PRIORITY_INTERACTIVE))
+    await asyncio.sleep(0)
+    assert order == ['bulk0', 'interactive']
+    await asyncio.gather(*tasks)
+
+
+@pytest.mark.asyncio
+async def test_expired_requests_are_not_sent():
+    scheduler = RequestScheduler(max_concurrency=1)
+    order = []
+    blocker = _spawn(scheduler, order, 'blocker')
+    await asyncio.sleep(0)
+    late = _spawn(scheduler, order, 'late', timeout=0.001)
+
+    with pytest.raises(ImdbDeadlineExceeded):
+        await late
+    await blocker
+
+    assert order == ['blocker']
+    assert scheduler.expired == 1
+    assert scheduler.in_flight == 0
+    async with scheduler.slot():
+        assert scheduler.in_flight == 1
+
+
+def test_invalid_priority():
+    with pytest.raises(ValueError):
+        with scheduling(priority=5):
+            pass
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from aioimdb import BatchSearch, Imdb
+
+
+class FakeImdb(Imdb):
+
+    def __init__(self):
+        super().__init__()
+        self.searched = []
+
+    async def search_for_title(self, title, locale=None):
+        self.searched.append(title)
+        if not any(char.isalnum() for char in title):
+            raise ValueError('invalid query')
+        # longer queries answer faster, to shuffle completion order
+        await asyncio.sleep(0.01 / len(title))
+        return [{'title': title}]
+
+
+QUERIES = [
+    'Mission: Impossible', 'mission impossible', 'Mission  Impossible!',
+    '???', 'Heat', 'Mission_Impossible', 'Heat',
+]
+
+
+async def _feed():
+    for query in QUERIES:
+        yield query
+
+
+@pytest.mark.asyncio
+async def test_ordered_batch_search():
+    imdb = FakeImdb()
+    batch = BatchSearch(imdb, concurrency=2)
+
+    results = [result async for result in batch.run(_feed())]
+
+    assert [result.query for result in results] == QUERIES
+    assert sorted(imdb.searched) == \
+        ['', 'Heat', 'Mission_Impossible', 'mission_impossible']
+    assert results[0].results is results[2].results
+    assert results[0].results is results[5].results
+    assert isinstance(results[3].error, ValueError)
+    assert results[3].results is None
+
+    stats = batch.stats()
+    assert stats['queries'] == 7
+    assert stats['unique'] == 4
+    assert stats['dedup_ratio'] == pytest.approx(3 / 7)
+    assert stats['errors'] == 1
+    assert stats['throughput'] > 0
+
+
+@pytest.mark.asyncio
+async def test_unordered_batch_search():
+    imdb = FakeImdb()
+    batch = BatchSearch(imdb, ordered=False, window=2)
+
+    results = [result async for result in batch.run(QUERIES)]
+
+    assert sorted(result.query for result in results) == sorted(QUERIES)
+    assert len(imdb.searched) == 4
+    for result in results:
+        if result.error is None:
+            assert result.results == [{'title': result.normalized}]
+
+
+class SlowFirstImdb(FakeImdb):
+
+    async def search_for_title(self, title, locale=None):
+        if title == 'slow':
+            await asyncio.sleep(0.2)
+        return await super().search_for_title(title, locale)
+
+
+@pytest.mark.asyncio
+async def test_dedup_table_is_bounded():
+    imdb = SlowFirstImdb()
+    batch = BatchSearch(imdb, concurrency=5, ordered=False, window=10,
+                        dedup_size=20)
+    queries = ['slow'] + [f'query {number}' for number in range(200)]
+    largest = 0
+
+    async for result in batch.run(queries):
+        largest = max(largest, len(batch._tasks))
+
+    assert batch.unique == 201
+    assert largest <= batch.dedup_size + batch.window
@@ -0,0 +1,106 @@
+import asyncio
+import concurrent.futures
+import threading
+
+import pytest
+
+from aioimdb import Imdb, SyncImdb
+
+
+class FakeImdb(Imdb):
+
+    async def is_redirection_title(self, imdb_id):
+        return False
+
+    async def _get_resource(self, path, locale=None, auth_headers=None):
+        if 'tt9999999' in path:
+            raise LookupError(f'Resource {path} not found')
+        return {'path': path, 'thread': threading.current_thread().name}
+
+    async def iter_numbers(self, count):
+        for number in range(count):
+            yield number
+
+    async def slow(self, events):
+        try:
+            await asyncio.sleep(0.2)
+            events.append('finished')
+        except asyncio.CancelledError:
+            events.append('cancelled')
+            raise
+
+
+class BrokenImdb(Imdb):
+
+    def __init__(self):
+        raise RuntimeError('broken')
+
+
+@pytest.fixture
+def client():
+    with SyncImdb(client_class=FakeImdb) as client:
+        yield client
+
+
+def test_endpoint_method(client):
+    resource = client.get_title_plot('tt0111161')
+
+    assert resource['path'] == '/title/tt0111161/plot'
+    assert resource['thread'] == 'aioimdb-sync'
+
+
+def test_regular_methods(client):
+    assert client.get_title('tt0111161')['path'] == \
+        '/title/tt0111161/auxiliary'
+    assert client.locale == 'en_US'
+    with pytest.raises(ValueError):
+        client.validate_imdb_id('invalid')
+    with pytest.raises(LookupError):
+        client.get_title_plot('tt9999999')
+
+
+def test_bulk(client):
+    results = client.bulk([
+        ('get_title_plot', 'tt0111161'),
+        ('get_title_plot', 'tt9999999'),
+        ('get_name', 'nm0000151', {}),
+    ], return_exceptions=True)
+
+    assert results[0]['path'] == '/title/tt0111161/plot'
+    assert isinstance(results[1], LookupError)
+    assert results[2]['path'] == '/name/nm0000151/fulldetails'
+
+
+def test_close_stops_loop():
+    client = SyncImdb(client_class=FakeImdb)
+    client.close()
+    client.close()
+
+    assert not client._thread.is_alive()
+    assert client._imdb._session is None
+
+
+def test_async_generator_methods(client):
+    assert list(client.iter_numbers(3)) == [0, 1, 2]
+
+    numbers = client.iter_numbers(10)
+    assert next(numbers) == 0
+    numbers.close()
+
+
+def test_timeout_cancels_call():
+    events = []
+    with SyncImdb(client_class=FakeImdb, timeout=0.05) as client:
+        with pytest.raises(concurrent.futures.TimeoutError):
+            client.slow(events)
+        client._run(asyncio.sleep(0.01))
+
+    assert events == ['cancelled']
+
+
+def test_failed_constructor_stops_loop():
+    threads = threading.active_count()
+    with pytest.raises(RuntimeError):
+        SyncImdb(client_class=BrokenImdb)
+
+    assert threading.active_count() == threads